@@ -0,0 +1,221 @@
+import asyncio
+import inspect
+import time
+
+from a6_include import hash_function_1
+from hash_map_sc import HashMap
+
+
+class AsyncHashMapCache:
+    """
+    asyncio read-through cache over a separate chaining HashMap.
+    Concurrent misses for one key share a single loader call.
+    Supported methods: get_or_load, get, invalidate, clear and statistics
+    """
+
+    def __init__(self,
+                 capacity: int = 11,
+                 function: callable = hash_function_1,
+                 max_loaders: int = None,
+                 ttl: float = None,
+                 stale_ttl: float = 0.0,
+                 negative_ttl: float = None,
+                 clock: callable = time.monotonic) -> None:
+        """
+        Initialize an empty cache. Values are fresh for ttl seconds (forever
+        if None), then served stale for stale_ttl more seconds while one
+        background load refreshes them. A loader result of None is cached
+        for negative_ttl seconds, or not at all if negative_ttl is None.
+        At most max_loaders loaders run at once when it is set
+        """
+        if max_loaders is not None and max_loaders < 1:
+            raise ValueError("max_loaders must be positive")
+
+        # key -> (value, load time); in-flight key -> loading task
+        self._entries = HashMap(capacity, function)
+        self._in_flight = HashMap(capacity, function)
+        self._semaphore = asyncio.Semaphore(max_loaders) if max_loaders else None
+
+        self._ttl = ttl
+        self._stale_ttl = stale_ttl
+        self._negative_ttl = negative_ttl
+        self._clock = clock
+
+        self._hits = 0
+        self._stale_hits = 0
+        self._misses = 0
+        self._loads = 0
+
+    def __str__(self) -> str:
+        """
+        Override string method to provide more readable output
+        """
+        return (f"AsyncHashMapCache(size={self._entries.get_size()}, hits={self._hits}, "
+                f"stale_hits={self._stale_hits}, misses={self._misses}, "
+                f"loads={self._loads})")
+
+    async def get_or_load(self, key: str, loader: callable) -> object:
+        """
+        Return the cached value of key, awaiting loader(key) on a miss.
+        loader may return a value or an awaitable; its exceptions
+        propagate to every caller waiting on that load
+        """
+        entry = self._entries.get(key)
+        if entry is not None:
+            value, loaded_at = entry
+            age = self._clock() - loaded_at
+            if value is None:
+                # Negative entries are never served stale
+                if age < self._negative_ttl:
+                    self._hits += 1
+                    return None
+            elif self._ttl is None or age < self._ttl:
+                self._hits += 1
+                return value
+            elif age < self._ttl + self._stale_ttl:
+                self._stale_hits += 1
+                if not self._in_flight.contains_key(key):
+                    self._start_load(key, loader).add_done_callback(_consume_exception)
+                return value
+
+        self._misses += 1
+        task = self._in_flight.get(key)
+        if task is None:
+            task = self._start_load(key, loader)
+        # A cancelled caller must not cancel the load other callers share
+        return await asyncio.shield(task)
+
+    def _start_load(self, key: str, loader: callable) -> asyncio.Task:
+        """
+        Start the single load of key and record it as in flight
+        """
+        task = asyncio.get_running_loop().create_task(self._load(key, loader))
+        self._in_flight.put(key, task)
+        return task
+
+    async def _load(self, key: str, loader: callable) -> object:
+        """
+        Call loader for key under the concurrency bound and cache its result
+        """
+        try:
+            if self._semaphore is None:
+                value = await self._call(key, loader)
+            else:
+                async with self._semaphore:
+                    value = await self._call(key, loader)
+        finally:
+            self._in_flight.remove(key)
+
+        if value is not None:
+            self._entries.put(key, (value, self._clock()))
+        elif self._negative_ttl is not None:
+            self._entries.put(key, (None, self._clock()))
+        else:
+            self._entries.remove(key)
+        return value
+
+    async def _call(self, key: str, loader: callable) -> object:
+        """
+        Call loader once, awaiting its result if it is awaitable
+        """
+        self._loads += 1
+        value = loader(key)
+        if inspect.isawaitable(value):
+            value = await value
+        return value
+
+    def get(self, key: str) -> object:
+        """
+        Return the cached value of key, stale or not, without loading it
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        return entry[0]
+
+    def invalidate(self, key: str) -> None:
+        """
+        Drop the cached value of key; a load already in flight still completes
+        """
+        self._entries.remove(key)
+
+    def clear(self) -> None:
+        """
+        Drop every cached value and reset statistics
+        """
+        self._entries.clear()
+        self._hits = 0
+        self._stale_hits = 0
+        self._misses = 0
+        self._loads = 0
+
+    def get_size(self) -> int:
+        """
+        Return number of cached values, including negative entries
+        """
+        return self._entries.get_size()
+
+    def get_hits(self) -> int:
+        """
+        Return number of lookups answered with a fresh cached value
+        """
+        return self._hits
+
+    def get_stale_hits(self) -> int:
+        """
+        Return number of lookups answered with a stale value while refreshing
+        """
+        return self._stale_hits
+
+    def get_misses(self) -> int:
+        """
+        Return number of lookups that waited on a load
+        """
+        return self._misses
+
+    def get_loads(self) -> int:
+        """
+        Return number of times a loader was called
+        """
+        return self._loads
+
+
+def _consume_exception(task: asyncio.Task) -> None:
+    """
+    Retrieve the exception of a background refresh nobody awaits,
+    so a failed refresh keeps serving the stale value quietly
+    """
+    if not task.cancelled():
+        task.exception()
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+
+    async def basic_testing() -> None:
+        now = 0.0
+
+        async def backend(key: str) -> object:
+            await asyncio.sleep(0.01)
+            return None if key.startswith('missing') else key.upper()
+
+        print("\nAsyncHashMapCache - thundering herd")
+        print("-----------------------------------")
+        cache = AsyncHashMapCache(max_loaders=4, negative_ttl=1.0)
+        keys = ['key' + str(i % 10) for i in range(500)] + ['missing'] * 50
+        values = await asyncio.gather(*(cache.get_or_load(key, backend) for key in keys))
+        print(values[0], values[9], values[-1], cache.get_size(), cache)
+
+        print("\nAsyncHashMapCache - stale while revalidate")
+        print("------------------------------------------")
+        cache = AsyncHashMapCache(ttl=10.0, stale_ttl=5.0, clock=lambda: now)
+        print(await cache.get_or_load('key1', backend))
+        now = 12.0
+        print(await cache.get_or_load('key1', lambda key: 'fresh'), cache.get('key1'))
+        await asyncio.sleep(0)
+        print(cache.get('key1'), cache)
+        now = 100.0
+        print(await cache.get_or_load('key1', backend), cache)
+
+    asyncio.run(basic_testing())
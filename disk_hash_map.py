@@ -0,0 +1,719 @@
+import mmap
+import os
+import pickle
+import struct
+import zlib
+from array import array
+from bisect import bisect_right
+from itertools import accumulate
+
+from a6_include import DynamicArray
+from int_hash_map import IntHashMap
+
+# Sidecar directory file: magic, page size, initial buckets, level,
+# split pointer, size, record bytes, page count, free page count;
+# followed by the primary page of every bucket and the free page list
+DIRECTORY = struct.Struct('<8sQQQQQQQQ')
+MAGIC = b'DSKMAP01'
+
+# Page header: next overflow page, record count; key lengths, value
+# lengths, key bytes and value bytes of the records follow
+PAGE_HEADER = struct.Struct('<qI')
+NO_PAGE = -1
+
+# Bytes of the length arrays per record
+RECORD_SIZE = 6
+
+# Values larger than this fraction of a page go to a chain of blob pages.
+# The record then holds a reference: a NUL marker, which no pickle starts
+# with, the first blob page and the value length. Each blob page starts
+# with a PAGE_HEADER of next blob page and byte count
+BLOB_FRACTION = 4
+BLOB_REFERENCE = struct.Struct('<cqQ')
+BLOB_MARKER = b'\x00'
+
+# The data file grows by at least this many pages at a time
+GROWTH_PAGES = 256
+
+
+class Page:
+    """
+    One page of a bucket chain. Records are kept in the on-disk column
+    layout, so decoding, encoding and key search run on whole byte strings
+    """
+
+    def __init__(self, number: int, next_page: int = NO_PAGE) -> None:
+        """
+        Initialize an empty page
+        """
+        self.number = number
+        self.next = next_page
+        self.key_lengths = array('H')
+        self.value_lengths = array('I')
+        self.keys = bytearray()
+        self.values = bytearray()
+        self.dirty = False
+        self._key_offsets = None
+
+    def __str__(self) -> str:
+        """
+        Override string method to provide more readable output
+        """
+        return f"page {self.number}: {self.length()} records, next {self.next}"
+
+    @classmethod
+    def decode(cls, number: int, data: bytes) -> "Page":
+        """
+        Return the page stored in data
+        """
+        next_page, count = PAGE_HEADER.unpack_from(data, 0)
+        page = cls(number, next_page)
+        offset = PAGE_HEADER.size
+        page.key_lengths.frombytes(data[offset:offset + 2 * count])
+        offset += 2 * count
+        page.value_lengths.frombytes(data[offset:offset + 4 * count])
+        offset += 4 * count
+        keys_end = offset + sum(page.key_lengths)
+        page.keys[:] = data[offset:keys_end]
+        page.values[:] = data[keys_end:keys_end + sum(page.value_lengths)]
+        return page
+
+    def encode(self) -> bytes:
+        """
+        Return the page in its on-disk layout
+        """
+        return b''.join((PAGE_HEADER.pack(self.next, self.length()),
+                         self.key_lengths.tobytes(), self.value_lengths.tobytes(),
+                         self.keys, self.values))
+
+    def length(self) -> int:
+        """
+        Return number of records in the page
+        """
+        return len(self.key_lengths)
+
+    def used(self) -> int:
+        """
+        Return encoded size of the page in bytes
+        """
+        return (PAGE_HEADER.size + RECORD_SIZE * len(self.key_lengths) +
+                len(self.keys) + len(self.values))
+
+    def find(self, key: bytes) -> int:
+        """
+        Return index of the record holding key, or -1 if not found
+        """
+        # The empty key matches at every offset; look for its length instead
+        if not key:
+            for i in range(len(self.key_lengths)):
+                if self.key_lengths[i] == 0:
+                    return i
+            return -1
+        position = self.keys.find(key)
+        if position < 0:
+            return -1
+        if self._key_offsets is None:
+            self._key_offsets = array('I', accumulate(self.key_lengths, initial=0))
+        # A match only counts if it covers exactly one key. Empty keys share
+        # their offset with the next record, so take the last record there
+        while position >= 0:
+            index = bisect_right(self._key_offsets, position) - 1
+            if (index < len(self.key_lengths) and self._key_offsets[index] == position and
+                    self.key_lengths[index] == len(key)):
+                return index
+            position = self.keys.find(key, position + 1)
+        return -1
+
+    def _value_start(self, index: int) -> int:
+        """
+        Return offset of a record's value within the value bytes
+        """
+        return sum(self.value_lengths[:index])
+
+    def key_at(self, index: int) -> bytes:
+        """
+        Return key of the record at index
+        """
+        start = sum(self.key_lengths[:index])
+        return bytes(self.keys[start:start + self.key_lengths[index]])
+
+    def value_at(self, index: int) -> bytes:
+        """
+        Return value of the record at index
+        """
+        start = self._value_start(index)
+        return bytes(self.values[start:start + self.value_lengths[index]])
+
+    def records(self) -> DynamicArray:
+        """
+        Return every (key, value) record of the page
+        """
+        result = DynamicArray()
+        key_start = value_start = 0
+        for i in range(len(self.key_lengths)):
+            key_end = key_start + self.key_lengths[i]
+            value_end = value_start + self.value_lengths[i]
+            result.append((bytes(self.keys[key_start:key_end]),
+                           bytes(self.values[value_start:value_end])))
+            key_start, value_start = key_end, value_end
+        return result
+
+    def append(self, key: bytes, value: bytes) -> None:
+        """
+        Add a record; the caller has checked that it fits
+        """
+        self.key_lengths.append(len(key))
+        self.value_lengths.append(len(value))
+        self.keys += key
+        self.values += value
+        self._key_offsets = None
+
+    def delete(self, index: int) -> None:
+        """
+        Remove the record at index
+        """
+        start = sum(self.key_lengths[:index])
+        del self.keys[start:start + self.key_lengths[index]]
+        start = self._value_start(index)
+        del self.values[start:start + self.value_lengths[index]]
+        del self.key_lengths[index]
+        del self.value_lengths[index]
+        self._key_offsets = None
+
+    def replace_value(self, index: int, value: bytes) -> None:
+        """
+        Replace value of the record at index
+        """
+        start = self._value_start(index)
+        self.values[start:start + self.value_lengths[index]] = value
+        self.value_lengths[index] = len(value)
+
+
+class DiskHashMap:
+    def __init__(self,
+                 path: str,
+                 cache_pages: int = 1024,
+                 page_size: int = 4096,
+                 function: callable = None,
+                 initial_buckets: int = 16,
+                 max_load: float = 0.75) -> None:
+        """
+        Open or create a HashMap stored in a memory-mapped file at path,
+        with its bucket directory in the sidecar file path + '.dir'.
+        Buckets are chains of fixed-size pages that grow by linear hashing,
+        one bucket split at a time, once record bytes exceed max_load of the
+        primary pages. At most cache_pages decoded pages are kept in memory.
+        Values over page_size / BLOB_FRACTION bytes pickled are stored in
+        chains of blob pages, so their size is not limited by the page size;
+        a key must fit in a page next to a blob reference.
+        function hashes str keys and must give the same value in every
+        process; the default is crc32 of the UTF-8 key. page_size and
+        initial_buckets only apply when the map is created
+        """
+        if cache_pages < 4:
+            raise ValueError("cache_pages must be at least 4")
+        if max_load <= 0:
+            raise ValueError("max_load must be positive")
+        self._path = path
+        self._hash_function = function
+        self._max_load = max_load
+
+        # CLOCK page cache: slot -> page, page number -> slot
+        self._cache_pages = cache_pages
+        self._cached = DynamicArray([None] * cache_pages)
+        self._referenced = bytearray(cache_pages)
+        self._slots = IntHashMap(cache_pages * 2)
+        self._hand = 0
+
+        if os.path.exists(self._directory_path()):
+            self._file = open(path, 'r+b')
+            self._load_directory()
+            self._mmap = mmap.mmap(self._file.fileno(), 0)
+        else:
+            self._file = open(path, 'w+b')
+            self._create(page_size, initial_buckets)
+
+    def __str__(self) -> str:
+        """
+        Override string method to provide more readable output
+        """
+        return (f"DiskHashMap {self._path}: {self._size} keys, "
+                f"{self.get_capacity()} buckets, {self._page_count} pages")
+
+    def __enter__(self) -> "DiskHashMap":
+        """
+        Use the map as a context manager
+        """
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        """
+        Flush and close the map when leaving the context
+        """
+        self.close()
+
+    def _directory_path(self) -> str:
+        """
+        Return path of the sidecar directory file
+        """
+        return self._path + '.dir'
+
+    def _create(self, page_size: int, initial_buckets: int) -> None:
+        """
+        Initialize an empty map with one primary page per initial bucket
+        """
+        if page_size < PAGE_HEADER.size + RECORD_SIZE + 16:
+            raise ValueError(f"page size {page_size} is too small")
+        self._page_size = page_size
+        self._initial_buckets = max(initial_buckets, 1)
+        self._level = 0
+        self._split = 0
+        self._size = 0
+        self._bytes = 0
+        self._page_count = 0
+        self._bucket_pages = array('q')
+        self._free_pages = array('q')
+        self._file.truncate(page_size * GROWTH_PAGES)
+        self._mmap = mmap.mmap(self._file.fileno(), 0)
+        for _ in range(self._initial_buckets):
+            self._bucket_pages.append(self._allocate().number)
+
+    def _load_directory(self) -> None:
+        """
+        Restore the map state saved by flush()
+        """
+        with open(self._directory_path(), 'rb') as directory:
+            data = directory.read()
+        (magic, self._page_size, self._initial_buckets, self._level, self._split,
+         self._size, self._bytes, self._page_count, free_count) = DIRECTORY.unpack_from(data, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{self._directory_path()} is not a DiskHashMap directory")
+        offset = DIRECTORY.size
+        self._bucket_pages = array('q')
+        self._bucket_pages.frombytes(data[offset:offset + 8 * self.get_capacity()])
+        offset += 8 * self.get_capacity()
+        self._free_pages = array('q')
+        self._free_pages.frombytes(data[offset:offset + 8 * free_count])
+
+    def _save_directory(self) -> None:
+        """
+        Write the map state to the sidecar file, replacing it atomically
+        """
+        temporary = self._directory_path() + '.tmp'
+        with open(temporary, 'wb') as directory:
+            directory.write(DIRECTORY.pack(
+                MAGIC, self._page_size, self._initial_buckets, self._level, self._split,
+                self._size, self._bytes, self._page_count, len(self._free_pages)))
+            directory.write(self._bucket_pages.tobytes())
+            directory.write(self._free_pages.tobytes())
+        os.replace(temporary, self._directory_path())
+
+    def get_size(self) -> int:
+        """
+        Return size of map
+        """
+        return self._size
+
+    def get_capacity(self) -> int:
+        """
+        Return number of buckets
+        """
+        return (self._initial_buckets << self._level) + self._split
+
+    def table_load(self) -> float:
+        """
+        Returns current load factor
+        """
+        return self._size / self.get_capacity()
+
+    # ------------------------------------------------------------------ #
+
+    def _hash(self, key: bytes) -> int:
+        """
+        Return hash value of an encoded key
+        """
+        if self._hash_function is None:
+            return zlib.crc32(key)
+        return self._hash_function(key.decode('utf-8', 'surrogatepass'))
+
+    def _bucket(self, hash_value: int) -> int:
+        """
+        Return bucket of a hash value; buckets before the split pointer
+        have already been split and use the next level's modulus
+        """
+        buckets = self._initial_buckets << self._level
+        index = hash_value % buckets
+        if index < self._split:
+            index = hash_value % (buckets * 2)
+        return index
+
+    def _read_page(self, number: int) -> Page:
+        """
+        Decode a page from the data file
+        """
+        start = number * self._page_size
+        return Page.decode(number, self._mmap[start:start + self._page_size])
+
+    def _write_page(self, page: Page) -> None:
+        """
+        Encode a page into the data file
+        """
+        data = page.encode()
+        start = page.number * self._page_size
+        self._mmap[start:start + len(data)] = data
+        page.dirty = False
+
+    def _page(self, number: int) -> Page:
+        """
+        Return a page through the cache, reading it on a miss
+        """
+        slot = self._slots.get(number)
+        if slot is not None:
+            self._referenced[slot] = 1
+            return self._cached._data[slot]
+        page = self._read_page(number)
+        self._cache(page)
+        return page
+
+    def _cache(self, page: Page) -> None:
+        """
+        Place a page in the cache, replacing any cached copy of its number
+        """
+        slot = self._slots.get(page.number)
+        if slot is None:
+            slot = self._evict()
+            self._slots.put(page.number, slot)
+        self._cached._data[slot] = page
+        self._referenced[slot] = 1
+
+    def _evict(self) -> int:
+        """
+        Free a cache slot with the CLOCK policy, writing back a dirty page
+        """
+        while True:
+            slot = self._hand
+            self._hand = (slot + 1) % self._cache_pages
+            # Recently used pages get a second chance
+            if self._referenced[slot]:
+                self._referenced[slot] = 0
+                continue
+            page = self._cached._data[slot]
+            if page is not None:
+                if page.dirty:
+                    self._write_page(page)
+                self._slots.remove(page.number)
+                self._cached._data[slot] = None
+            return slot
+
+    def _modified(self, page: Page) -> None:
+        """
+        Mark a page dirty; a page evicted while in use is written through
+        """
+        slot = self._slots.get(page.number)
+        if slot is not None and self._cached._data[slot] is page:
+            page.dirty = True
+        else:
+            self._write_page(page)
+
+    def _allocate(self) -> Page:
+        """
+        Return a new empty page, reusing a freed page when possible
+        """
+        page = Page(self._allocate_number())
+        self._cache(page)
+        page.dirty = True
+        return page
+
+    def _allocate_number(self) -> int:
+        """
+        Return the number of a page nothing uses, reusing a freed page when
+        possible; a cached copy of a reused page is dropped unwritten
+        """
+        if len(self._free_pages):
+            number = self._free_pages.pop()
+            slot = self._slots.get(number)
+            if slot is not None:
+                self._slots.remove(number)
+                self._cached._data[slot] = None
+        else:
+            number = self._page_count
+            self._page_count += 1
+            # Grow the file geometrically, remapping it
+            mapped = len(self._mmap) // self._page_size
+            if number >= mapped:
+                self._mmap.close()
+                self._file.truncate(self._page_size * max(mapped * 2, mapped + GROWTH_PAGES))
+                self._mmap = mmap.mmap(self._file.fileno(), 0)
+        return number
+
+    def _write_blob(self, data: bytes) -> bytes:
+        """
+        Store data in a new chain of blob pages, written straight to the
+        data file, and return the reference a record holds instead
+        """
+        capacity = self._page_size - PAGE_HEADER.size
+        numbers = array('q')
+        for _ in range(-(-len(data) // capacity)):
+            numbers.append(self._allocate_number())
+        for i in range(len(numbers)):
+            chunk = data[i * capacity:(i + 1) * capacity]
+            next_page = numbers[i + 1] if i + 1 < len(numbers) else NO_PAGE
+            start = numbers[i] * self._page_size
+            self._mmap[start:start + PAGE_HEADER.size + len(chunk)] = (
+                PAGE_HEADER.pack(next_page, len(chunk)) + chunk)
+        return BLOB_REFERENCE.pack(BLOB_MARKER, numbers[0], len(data))
+
+    def _blob_pages(self, reference: bytes):
+        """
+        Yield number, byte count and data start of each page of a blob
+        """
+        number = BLOB_REFERENCE.unpack(reference)[1]
+        while number != NO_PAGE:
+            start = number * self._page_size
+            next_page, count = PAGE_HEADER.unpack_from(self._mmap, start)
+            yield number, count, start + PAGE_HEADER.size
+            number = next_page
+
+    def _value(self, stored: bytes) -> object:
+        """
+        Return the value a record holds, reading it from its blob pages
+        if the record holds a reference
+        """
+        if stored[:1] == BLOB_MARKER:
+            data = bytearray()
+            for _, count, start in self._blob_pages(stored):
+                data += self._mmap[start:start + count]
+            stored = data
+        return pickle.loads(stored)
+
+    def _free_blob(self, stored: bytes) -> None:
+        """
+        Return the blob pages of a record's value, if any, to the free list
+        """
+        if stored[:1] == BLOB_MARKER:
+            for number, _, _ in self._blob_pages(stored):
+                self._free_pages.append(number)
+
+    def _find(self, key: bytes, bucket: int) -> tuple[Page, Page, int]:
+        """
+        Return previous page, page and record index of key in a bucket chain,
+        or None, None, -1 if not found
+        """
+        previous, number = None, self._bucket_pages[bucket]
+        while number != NO_PAGE:
+            page = self._page(number)
+            index = page.find(key)
+            if index >= 0:
+                return previous, page, index
+            previous, number = page, page.next
+        return None, None, -1
+
+    def _insert(self, bucket: int, key: bytes, value: bytes) -> None:
+        """
+        Append a record to the first page of a bucket chain with room,
+        adding an overflow page at the end of the chain if none has
+        """
+        length = RECORD_SIZE + len(key) + len(value)
+        page = self._page(self._bucket_pages[bucket])
+        while page.used() + length > self._page_size:
+            if page.next == NO_PAGE:
+                overflow = self._allocate()
+                page.next = overflow.number
+                self._modified(page)
+                page = overflow
+                break
+            page = self._page(page.next)
+        page.append(key, value)
+        self._modified(page)
+
+    def _split_bucket(self) -> None:
+        """
+        Split the bucket at the split pointer into itself and a new bucket
+        """
+        old = self._split
+        self._split += 1
+        if self._split == self._initial_buckets << self._level:
+            self._level += 1
+            self._split = 0
+
+        # Take every record out of the chain, keeping only its primary page
+        chain = DynamicArray()
+        primary = self._page(self._bucket_pages[old])
+        page = primary
+        while True:
+            chain.append(page.records())
+            if page.next == NO_PAGE:
+                break
+            page = self._page(page.next)
+            self._free_pages.append(page.number)
+            page.dirty = False
+        primary = Page(primary.number)
+        self._cache(primary)
+        self._modified(primary)
+
+        self._bucket_pages.append(self._allocate().number)
+        for i in range(chain.length()):
+            records = chain[i]
+            for j in range(records.length()):
+                key, value = records[j]
+                self._insert(self._bucket(self._hash(key)), key, value)
+
+    def put(self, key: str, value: object) -> None:
+        """
+        Updates the key/value pair in the hash map
+        """
+        key_bytes = key.encode('utf-8', 'surrogatepass')
+        if (PAGE_HEADER.size + RECORD_SIZE + len(key_bytes) + BLOB_REFERENCE.size > self._page_size
+                or len(key_bytes) > 0xFFFF):
+            raise ValueError(f"key of {len(key_bytes)} bytes does not fit in a {self._page_size} byte page")
+
+        bucket = self._bucket(self._hash(key_bytes))
+        _, page, index = self._find(key_bytes, bucket)
+        value_bytes = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        if len(value_bytes) > self._page_size // BLOB_FRACTION:
+            value_bytes = self._write_blob(value_bytes)
+        length = RECORD_SIZE + len(key_bytes) + len(value_bytes)
+        if page is None:
+            self._size += 1
+        else:
+            self._free_blob(page.value_at(index))
+            # Replace in place if the new value fits, otherwise move the record
+            old_length = page.value_lengths[index]
+            self._bytes += len(value_bytes) - old_length
+            if page.used() + len(value_bytes) - old_length <= self._page_size:
+                page.replace_value(index, value_bytes)
+                self._modified(page)
+                return
+            page.delete(index)
+            self._modified(page)
+            self._bytes -= length
+        self._insert(bucket, key_bytes, value_bytes)
+        self._bytes += length
+
+        # Split one bucket whenever records fill too much of the primary pages
+        if self._bytes > self._max_load * self.get_capacity() * (self._page_size - PAGE_HEADER.size):
+            self._split_bucket()
+
+    def get(self, key: str, default: object = None) -> object:
+        """
+        Returns value associated with a given key, or default if not found
+        """
+        key_bytes = key.encode('utf-8', 'surrogatepass')
+        _, page, index = self._find(key_bytes, self._bucket(self._hash(key_bytes)))
+        if page is None:
+            return default
+        return self._value(page.value_at(index))
+
+    def contains_key(self, key: str) -> bool:
+        """
+        Determines if a given key is in the hash map
+        """
+        key_bytes = key.encode('utf-8', 'surrogatepass')
+        return self._find(key_bytes, self._bucket(self._hash(key_bytes)))[1] is not None
+
+    def remove(self, key: str) -> None:
+        """
+        Removes a value from the hash map using its key
+        """
+        key_bytes = key.encode('utf-8', 'surrogatepass')
+        previous, page, index = self._find(key_bytes, self._bucket(self._hash(key_bytes)))
+        if page is None:
+            return
+        self._bytes -= RECORD_SIZE + len(key_bytes) + page.value_lengths[index]
+        self._free_blob(page.value_at(index))
+        page.delete(index)
+        self._size -= 1
+        # Unlink an emptied overflow page; primary pages stay in place
+        if previous is not None and page.length() == 0:
+            previous.next = page.next
+            self._modified(previous)
+            self._free_pages.append(page.number)
+            page.dirty = False
+        else:
+            self._modified(page)
+
+    def get_keys_and_values(self) -> DynamicArray:
+        """
+        Returns array that contains each key/value pair in the hash map;
+        reads every page of the map
+        """
+        result = DynamicArray()
+        for bucket in range(self.get_capacity()):
+            number = self._bucket_pages[bucket]
+            while number != NO_PAGE:
+                page = self._page(number)
+                records = page.records()
+                for i in range(records.length()):
+                    key, value = records[i]
+                    result.append((key.decode('utf-8', 'surrogatepass'), self._value(value)))
+                number = page.next
+        return result
+
+    def clear(self) -> None:
+        """
+        Clears content of hash map, shrinking the file back to the initial buckets
+        """
+        self._cached = DynamicArray([None] * self._cache_pages)
+        self._referenced = bytearray(self._cache_pages)
+        self._slots = IntHashMap(self._cache_pages * 2)
+        self._mmap.close()
+        self._file.truncate(0)
+        self._create(self._page_size, self._initial_buckets)
+
+    def flush(self) -> None:
+        """
+        Write every dirty cached page and the directory, then sync the file
+        """
+        for slot in range(self._cache_pages):
+            page = self._cached._data[slot]
+            if page is not None and page.dirty:
+                self._write_page(page)
+        self._mmap.flush()
+        self._save_directory()
+
+    def close(self) -> None:
+        """
+        Flush and release the data file
+        """
+        if self._file.closed:
+            return
+        self.flush()
+        self._mmap.close()
+        self._file.close()
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+    import tempfile
+
+    print("\nDiskHashMap - put, split and reopen")
+    print("-----------------------------------")
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, 'map.bin')
+    with DiskHashMap(path, cache_pages=8, page_size=256, initial_buckets=2) as m:
+        for i in range(500):
+            m.put('str' + str(i), i * 100)
+        m.remove('str1')
+        print(m.get_size(), m.get_capacity(), m.get('str7'), m.contains_key('str1'))
+    with DiskHashMap(path) as m:
+        print(m.get_size(), m.get_capacity(), m.get('str499'), m.get('str1', 'default'))
+
+    print("\nDiskHashMap - empty key beside others")
+    print("-------------------------------------")
+    with DiskHashMap(os.path.join(directory, 'empty.bin'), initial_buckets=1) as m:
+        m.put('', 1)
+        m.put('ab', 2)
+        m.put('ab', 3)
+        print(m.get_size(), m.get(''), m.get('ab'), m.contains_key('ab'))
+
+    print("\nDiskHashMap - values larger than a page")
+    print("---------------------------------------")
+    with DiskHashMap(os.path.join(directory, 'blob.bin'), page_size=256, initial_buckets=2) as m:
+        m.put('big', 'x' * 5000)
+        m.put('small', 1)
+        m.put('big', 'y' * 700)
+        pages = m._page_count
+        m.remove('big')
+        m.put('big', 'z' * 600)
+        print(m.get_size(), len(m.get('big')), m.get('small'), m._page_count == pages)
@@ -0,0 +1,244 @@
+from array import array
+
+from a6_include import DynamicArray
+from int_hash_map import IntHashMap
+
+MASK_64 = (1 << 64) - 1
+
+# Average keys per displacement bucket; lower builds faster, higher saves memory
+KEYS_PER_BUCKET = 2
+
+# Displacements tried for one bucket before the whole build is reseeded
+MAX_ATTEMPTS = 1 << 16
+MAX_SEEDS = 8
+# Multipliers tried per offset within those displacements
+MULTIPLIERS = 64
+
+
+class FrozenHashMap:
+    """
+    Read-only map built with a CHD-style minimal perfect hash:
+    every key owns exactly one of get_size() slots, so a lookup costs
+    one hash and one slot read.
+
+    Keys are hashed by seeding Python's hash() through a tuple rather than
+    with the source map's hash function, since a perfect hash needs
+    independent, distinct hash values (hash_function_1 maps all anagrams to
+    one value). Pickling rebuilds the table, because str hashes differ
+    between processes.
+    """
+
+    def __init__(self, keys_and_values: DynamicArray) -> None:
+        """
+        Build the map from an array of unique (key, value) pairs,
+        such as the result of HashMap.get_keys_and_values()
+        """
+        self._size = keys_and_values.length()
+        self._bucket_count = max(1, -(-self._size // KEYS_PER_BUCKET))
+        self._keys = DynamicArray([None] * self._size)
+        self._values = DynamicArray([None] * self._size)
+
+        for seed in range(MAX_SEEDS):
+            self._seed = seed
+            if self._build(keys_and_values):
+                return
+        self._raise_build_error(keys_and_values)
+
+    def __str__(self) -> str:
+        """
+        Override string method to provide more readable output
+        """
+        out = ''
+        for i in range(self._size):
+            out += str(i) + ': ' + str(self._keys[i]) + ': ' + str(self._values[i]) + '\n'
+        return out
+
+    def __reduce__(self):
+        """
+        Pickle as the key/value pairs and rebuild on load
+        """
+        return FrozenHashMap, (self.get_keys_and_values(),)
+
+    def _hash(self, key: object) -> tuple[int, int, int]:
+        """
+        Return displacement bucket and the two slot hashes of a key
+        """
+        bucket_hash = hash((self._seed, key)) & MASK_64
+        slot_hash = hash((key, self._seed)) & MASK_64
+        return (bucket_hash % self._bucket_count,
+                slot_hash % self._size,
+                (slot_hash >> 32) % self._size)
+
+    def _build(self, keys_and_values: DynamicArray) -> bool:
+        """
+        Find a displacement for every bucket with the current seed.
+        Return False if some bucket cannot be placed
+        """
+        n, bucket_count = self._size, self._bucket_count
+        buckets = array('q', [0]) * n
+        first = array('q', [0]) * n
+        second = array('q', [0]) * n
+        counts = array('q', [0]) * (bucket_count + 1)
+        for i in range(n):
+            buckets[i], first[i], second[i] = self._hash(keys_and_values[i][0])
+            counts[buckets[i] + 1] += 1
+
+        # Group keys by bucket (counting sort)
+        largest = 0
+        for g in range(bucket_count):
+            largest = max(largest, counts[g + 1])
+            counts[g + 1] += counts[g]
+        cursor = array('q', counts)
+        members = array('q', [0]) * n
+        for i in range(n):
+            members[cursor[buckets[i]]] = i
+            cursor[buckets[i]] += 1
+
+        # Order buckets from largest to smallest (counting sort)
+        by_size = array('q', [0]) * (largest + 2)
+        for g in range(bucket_count):
+            by_size[largest - (counts[g + 1] - counts[g]) + 1] += 1
+        for s in range(largest + 1):
+            by_size[s + 1] += by_size[s]
+        order = array('q', [0]) * bucket_count
+        for g in range(bucket_count):
+            position = largest - (counts[g + 1] - counts[g])
+            order[by_size[position]] = g
+            by_size[position] += 1
+
+        displacements = array('Q', [0]) * bucket_count
+        taken = bytearray(n)
+        slots = array('q', [0]) * max(largest, 1)
+        free = 0
+        multipliers = min(n, MULTIPLIERS)
+        # Offsets stay below n, so d0 * n + d1 decodes back to both
+        attempts = min(MAX_ATTEMPTS, multipliers * n)
+        for g in order:
+            start, end = counts[g], counts[g + 1]
+            if end - start == 0:
+                break
+
+            # Single keys go straight into the next free slot
+            if end - start == 1:
+                while taken[free]:
+                    free += 1
+                i = members[start]
+                taken[free] = 1
+                displacements[g] = (free - first[i]) % n
+                continue
+
+            # Vary the multiplier first, since keys sharing a first hash only
+            # separate through it; the offset then moves keys whose second
+            # hash shares a large factor with n and reaches few slots
+            for attempt in range(attempts):
+                d1, d0 = divmod(attempt, multipliers)
+                placed = 0
+                for j in range(start, end):
+                    i = members[j]
+                    slot = (first[i] + d0 * second[i] + d1) % n
+                    if taken[slot]:
+                        break
+                    taken[slot] = 1
+                    slots[placed] = slot
+                    placed += 1
+                if placed == end - start:
+                    displacements[g] = d0 * n + d1
+                    break
+                # Undo the partial placement and try the next displacement
+                for j in range(placed):
+                    taken[slots[j]] = 0
+            else:
+                return False
+
+        self._displacements = displacements
+        for i in range(n):
+            key, value = keys_and_values[i]
+            slot = self._slot(key)
+            self._keys[slot] = key
+            self._values[slot] = value
+        return True
+
+    @staticmethod
+    def _raise_build_error(keys_and_values: DynamicArray) -> None:
+        """
+        Raise ValueError naming two keys with equal hash() if there are any,
+        since every seeded tuple hash of such keys is equal too
+        """
+        seen = IntHashMap()
+        for i in range(keys_and_values.length()):
+            key = keys_and_values[i][0]
+            other = seen.get(hash(key))
+            if other is not None:
+                raise ValueError(f"cannot build a perfect hash; keys {other[0]!r} and "
+                                 f"{key!r} have identical hashes")
+            # Boxed, so a None key is not mistaken for a missing one
+            seen.put(hash(key), (key,))
+        raise ValueError(f"cannot build a perfect hash in {MAX_SEEDS} seeds")
+
+    def _slot(self, key: object) -> int:
+        """
+        Return the only slot that can hold the given key
+        """
+        # Same arithmetic as _hash(), inlined for lookup speed
+        n = self._size
+        bucket_hash = hash((self._seed, key)) & MASK_64
+        slot_hash = hash((key, self._seed)) & MASK_64
+        d0, d1 = divmod(self._displacements[bucket_hash % self._bucket_count], n)
+        return (slot_hash % n + d0 * ((slot_hash >> 32) % n) + d1) % n
+
+    def get_size(self) -> int:
+        """
+        Return size of map
+        """
+        return self._size
+
+    def get_capacity(self) -> int:
+        """
+        Return capacity of map, which always equals its size
+        """
+        return self._size
+
+    def get(self, key: object, default: object = None) -> object:
+        """
+        Returns value associated with a given key, or default if not found
+        """
+        if self._size == 0:
+            return default
+        slot = self._slot(key)
+        if self._keys._data[slot] == key:
+            return self._values._data[slot]
+        return default
+
+    def contains_key(self, key: object) -> bool:
+        """
+        Returns whether a key is in the map
+        """
+        if self._size == 0:
+            return False
+        return self._keys._data[self._slot(key)] == key
+
+    def get_keys_and_values(self) -> DynamicArray:
+        """
+        Returns array that contains each key/value pair in the map
+        """
+        result = DynamicArray()
+        for i in range(self._size):
+            result.append((self._keys[i], self._values[i]))
+        return result
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+    from a6_include import hash_function_1
+    from hash_map_sc import HashMap
+
+    print("\nFrozenHashMap - freeze")
+    print("----------------------")
+    m = HashMap(53, hash_function_1)
+    for i in range(150):
+        m.put('str' + str(i), i * 100)
+    m.put('tsr1', 'anagram')
+    frozen = m.freeze()
+    print(frozen.get_size(), frozen.get_capacity(), frozen.get('str7'), frozen.get('tsr1'))
+    print(frozen.contains_key('str149'), frozen.contains_key('str150'), frozen.get('missing', 'default'))
@@ -0,0 +1,268 @@
+import argparse
+import importlib
+import time
+
+from a6_include import DynamicArray, hash_function_1, hash_function_2
+from hash_cache import HashCache
+from int_hash_map import IntHashMap
+import hash_map_compact
+import hash_map_oa
+import hash_map_sc
+
+MASK_64 = (1 << 64) - 1
+
+
+class HashReport:
+    """
+    Bucket distribution and probe statistics of one hash function
+    on one corpus at one initial capacity
+    """
+
+    def __init__(self, name: str, capacity: int) -> None:
+        """
+        Initialize an empty report for a function and initial capacity
+        """
+        self.name = name
+        self.capacity = capacity
+        self.keys = 0
+        self.keys_per_second = 0.0
+        self.hash_collisions = 0
+
+        # Separate chaining table after every key has been put
+        self.sc_capacity = 0
+        self.chi_square = 0.0
+        self.chi_square_ratio = 0.0
+        self.max_chain = 0
+        self.mean_chain = 0.0
+        self.sc_collisions = 0
+        self.sc_lookup_cost = 0.0
+
+        # Open addressing table; oa_probes[i] counts keys found after i probes
+        self.oa_capacity = 0
+        self.oa_probes = DynamicArray([0])
+        self.oa_mean_probes = 0.0
+        self.oa_max_probes = 0
+
+    def __str__(self) -> str:
+        """
+        Override string method to provide more readable output
+        """
+        return (f"{self.name} @ {self.capacity}: {self.keys} keys, "
+                f"{round(self.keys_per_second)} keys/s, "
+                f"{self.hash_collisions} identical hashes\n"
+                f"  SC capacity {self.sc_capacity}: chi-square {round(self.chi_square, 1)} "
+                f"({round(self.chi_square_ratio, 3)} per dof), "
+                f"chain max {self.max_chain} mean {round(self.mean_chain, 3)}, "
+                f"{self.sc_collisions} bucket collisions, "
+                f"{round(self.sc_lookup_cost, 3)} nodes per hit\n"
+                f"  OA capacity {self.oa_capacity}: probes mean {round(self.oa_mean_probes, 3)} "
+                f"max {self.oa_max_probes}, p50 {self.probe_percentile(0.5)} "
+                f"p90 {self.probe_percentile(0.9)} p99 {self.probe_percentile(0.99)}")
+
+    def probe_percentile(self, fraction: float) -> int:
+        """
+        Return the probe count within which the given fraction of keys are found
+        """
+        target = fraction * self.keys
+        seen = 0
+        for probes in range(1, self.oa_probes.length()):
+            seen += self.oa_probes[probes]
+            if seen >= target:
+                return probes
+        return self.oa_max_probes
+
+    def score(self) -> float:
+        """
+        Return expected cost of a successful lookup in both engines; lower is better
+        """
+        return self.sc_lookup_cost + self.oa_mean_probes
+
+
+def load_corpus(source) -> DynamicArray:
+    """
+    Return keys from a file path (one key per line) or any iterable of keys
+    """
+    keys = DynamicArray()
+    if isinstance(source, str):
+        with open(source, encoding='utf-8') as corpus:
+            for line in corpus:
+                key = line.rstrip('\r\n')
+                if key:
+                    keys.append(key)
+    else:
+        for key in source:
+            keys.append(key)
+    return keys
+
+
+def hash_throughput(keys: DynamicArray, function: callable) -> float:
+    """
+    Return keys hashed per second by function over the corpus
+    """
+    start = time.perf_counter()
+    for i in range(keys.length()):
+        function(keys[i])
+    elapsed = time.perf_counter() - start
+    return keys.length() / elapsed if elapsed > 0 else 0.0
+
+
+def _count_hash_collisions(keys: DynamicArray, function: callable) -> int:
+    """
+    Return number of distinct keys whose full hash value another key already has
+    """
+    seen = hash_map_compact.HashMap(keys.length(), hash)
+    hashes = IntHashMap(keys.length() * 2)
+    for i in range(keys.length()):
+        key = keys[i]
+        if seen.contains_key(key):
+            continue
+        seen.put(key, True)
+        # Fold arbitrary hash values into int64 keys
+        folded = (function(key) & MASK_64) - (1 << 63)
+        hashes.increment(folded)
+    return seen.get_size() - hashes.get_size()
+
+
+def _analyze_separate_chaining(keys: DynamicArray, function: callable,
+                               report: HashReport) -> None:
+    """
+    Put every key into a real SC HashMap and measure its buckets
+    """
+    m = hash_map_sc.HashMap(report.capacity, function)
+    for i in range(keys.length()):
+        m.put(keys[i], None)
+
+    n, capacity = m.get_size(), m.get_capacity()
+    expected = n / capacity
+    chi_square, compared, longest = 0.0, 0, 0
+    for i in range(capacity):
+        length = m._buckets[i].length()
+        chi_square += (length - expected) ** 2 / expected if expected else 0.0
+        longest = max(longest, length)
+        # Chains are walked in order, treeified buckets binary searched
+        for node in m._buckets[i]:
+            compared += m._probe_length(node.key)
+
+    non_empty = capacity - m.empty_buckets()
+    report.keys = n
+    report.sc_capacity = capacity
+    report.chi_square = chi_square
+    report.chi_square_ratio = chi_square / max(capacity - 1, 1)
+    report.max_chain = longest
+    report.mean_chain = n / non_empty if non_empty else 0.0
+    report.sc_collisions = n - non_empty
+    report.sc_lookup_cost = compared / n if n else 0.0
+
+
+def _analyze_open_addressing(keys: DynamicArray, function: callable,
+                             report: HashReport, probe: str) -> None:
+    """
+    Put every key into a real OA HashMap and measure its probe lengths
+    """
+    m = hash_map_oa.HashMap(report.capacity, function, probe)
+    for i in range(keys.length()):
+        m.put(keys[i], None)
+
+    capacity = m.get_capacity()
+    histogram = DynamicArray([0])
+    total = 0
+    for slot in range(capacity):
+        entry = m._buckets[slot]
+        if entry is None or entry.is_tombstone:
+            continue
+        # Replay the map's own probe sequence until the entry is reached
+        index, step, increment = m._probe_start(function(entry.key), capacity)
+        probes = 1
+        while m._buckets[index] is not entry:
+            index = (index + step) % capacity
+            step += increment
+            probes += 1
+        while histogram.length() <= probes:
+            histogram.append(0)
+        histogram[probes] = histogram[probes] + 1
+        total += probes
+
+    report.oa_capacity = capacity
+    report.oa_probes = histogram
+    report.oa_mean_probes = total / m.get_size() if m.get_size() else 0.0
+    report.oa_max_probes = histogram.length() - 1
+
+
+def analyze(keys: DynamicArray, function: callable, capacity: int,
+            name: str = None, probe: str = 'quadratic') -> HashReport:
+    """
+    Return the report of one hash function on a corpus, simulated with the
+    real HashMap engines so resizes and prime capacities match exactly
+    """
+    report = HashReport(name or getattr(function, '__name__', str(function)), capacity)
+    report.keys_per_second = hash_throughput(keys, function)
+    report.hash_collisions = _count_hash_collisions(keys, function)
+
+    # Resizes rehash every key, so serve repeats from a cache
+    cached = HashCache(function, max(keys.length() * 2, 16))
+    _analyze_separate_chaining(keys, cached, report)
+    _analyze_open_addressing(keys, cached, report, probe)
+    return report
+
+
+def recommend(reports: DynamicArray) -> HashReport:
+    """
+    Return the report with the cheapest lookups, preferring faster hashing on ties
+    """
+    best = None
+    for i in range(reports.length()):
+        report = reports[i]
+        if (best is None or report.score() < best.score() or
+                (report.score() == best.score() and
+                 report.keys_per_second > best.keys_per_second)):
+            best = report
+    return best
+
+
+def _resolve_function(name: str) -> callable:
+    """
+    Return a bundled hash function by name, or module:function from the import path
+    """
+    if name == 'hash_function_1':
+        return hash_function_1
+    if name == 'hash_function_2':
+        return hash_function_2
+    module, _, attribute = name.partition(':')
+    if not attribute:
+        raise ValueError(f"expected hash_function_1, hash_function_2 or module:function, got {name}")
+    return getattr(importlib.import_module(module), attribute)
+
+
+def main(argv=None) -> None:
+    """
+    Command line entry point
+    """
+    parser = argparse.ArgumentParser(
+        description="Compare hash functions on a key corpus using both HashMap engines")
+    parser.add_argument('corpus', help="file with one key per line")
+    parser.add_argument('-f', '--function', action='append', dest='functions',
+                        help="hash_function_1, hash_function_2 or module:function "
+                             "(repeatable, default: both bundled functions)")
+    parser.add_argument('-c', '--capacity', action='append', type=int, dest='capacities',
+                        help="initial capacity (repeatable, default: 11)")
+    parser.add_argument('--probe', default='quadratic',
+                        choices=hash_map_oa.HashMap._PROBES,
+                        help="OA probe strategy")
+    args = parser.parse_args(argv)
+
+    keys = load_corpus(args.corpus)
+    reports = DynamicArray()
+    for name in args.functions or ['hash_function_1', 'hash_function_2']:
+        function = _resolve_function(name)
+        for capacity in args.capacities or [11]:
+            report = analyze(keys, function, capacity, name, args.probe)
+            reports.append(report)
+            print(report)
+
+    best = recommend(reports)
+    if best is not None:
+        print(f"\nRecommended: {best.name} (initial capacity {best.capacity})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+from a6_include import DynamicArray, hash_function_1, hash_function_2
+
+
+class HashCache:
+    """
+    Memoizing wrapper around a hash function.
+    Can be passed as the function argument of either HashMap
+    """
+
+    def __init__(self,
+                 function: callable = hash_function_1,
+                 capacity: int = 4096,
+                 ways: int = 4) -> None:
+        """
+        Initialize a bounded, set-associative cache of key -> hash values.
+        Each set holds `ways` entries and evicts with the CLOCK algorithm
+        """
+        if capacity < 1 or ways < 1:
+            raise ValueError("capacity and ways must be positive")
+
+        self._function = function
+        self._ways = ways
+        self._sets = max(1, capacity // ways)
+        self._capacity = self._sets * ways
+
+        # Parallel slot arrays; a slot with key None is empty
+        self._keys = DynamicArray([None] * self._capacity)
+        self._hashes = DynamicArray([0] * self._capacity)
+        self._referenced = DynamicArray([False] * self._capacity)
+        self._hands = DynamicArray([0] * self._sets)
+
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def __str__(self) -> str:
+        """
+        Override string method to provide more readable output
+        """
+        return (f"HashCache(capacity={self._capacity}, hits={self._hits}, "
+                f"misses={self._misses}, evictions={self._evictions}, "
+                f"hit_rate={round(self.hit_rate(), 4)})")
+
+    def __call__(self, key: str) -> int:
+        """
+        Return the hash of key, computing it only on a cache miss
+        """
+        keys = self._keys._data
+        # Python caches str hashes, so locating the set is cheap
+        start = (hash(key) % self._sets) * self._ways
+        for slot in range(start, start + self._ways):
+            if keys[slot] == key:
+                self._referenced._data[slot] = True
+                self._hits += 1
+                return self._hashes._data[slot]
+
+        self._misses += 1
+        value = self._function(key)
+        slot = self._victim(start)
+        keys[slot] = key
+        self._hashes._data[slot] = value
+        self._referenced._data[slot] = True
+        return value
+
+    def _victim(self, start: int) -> int:
+        """
+        Pick a slot in the set beginning at start using the CLOCK hand
+        """
+        keys = self._keys._data
+        referenced = self._referenced._data
+        set_index = start // self._ways
+        hand = self._hands._data[set_index]
+        # Sweep at most twice: the first pass clears reference bits
+        for _ in range(2 * self._ways):
+            slot = start + hand
+            hand = (hand + 1) % self._ways
+            if keys[slot] is None:
+                break
+            if not referenced[slot]:
+                self._evictions += 1
+                break
+            referenced[slot] = False
+        self._hands._data[set_index] = hand
+        return slot
+
+    def get_capacity(self) -> int:
+        """
+        Return the number of hashes the cache can hold
+        """
+        return self._capacity
+
+    def get_hits(self) -> int:
+        """
+        Return number of lookups answered from the cache
+        """
+        return self._hits
+
+    def get_misses(self) -> int:
+        """
+        Return number of lookups that called the wrapped function
+        """
+        return self._misses
+
+    def get_evictions(self) -> int:
+        """
+        Return number of cached hashes that have been evicted
+        """
+        return self._evictions
+
+    def hit_rate(self) -> float:
+        """
+        Return fraction of lookups answered from the cache
+        """
+        total = self._hits + self._misses
+        if total == 0:
+            return 0.0
+        return self._hits / total
+
+    def reset_stats(self) -> None:
+        """
+        Reset hit, miss and eviction counters, keeping cached hashes
+        """
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def clear(self) -> None:
+        """
+        Drop every cached hash and reset statistics
+        """
+        self._keys = DynamicArray([None] * self._capacity)
+        self._referenced = DynamicArray([False] * self._capacity)
+        self._hands = DynamicArray([0] * self._sets)
+        self.reset_stats()
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+    from hash_map_sc import HashMap
+
+    print("\nHashCache - repeated keys")
+    print("-------------------------")
+    cache = HashCache(hash_function_2, 64)
+    m = HashMap(53, cache)
+    for i in range(300):
+        m.put('key' + str(i % 40), i)
+    print(m.get_size(), m.get('key7'), cache)
+
+    print("\nHashCache - eviction")
+    print("--------------------")
+    cache = HashCache(hash_function_1, 8, 2)
+    for i in range(100):
+        cache('str' + str(i))
+    print(cache.get_capacity(), cache.get_evictions(), cache('str99') == hash_function_1('str99'))
@@ -0,0 +1,351 @@
+from array import array
+
+from a6_include import (DynamicArray, HashEntry,
+                        hash_function_1, hash_function_2)
+from key_arena import FrontCodedKeyArena, KeyArena
+
+# Index table markers; non-negative values are positions in the dense arrays
+EMPTY = -1
+DUMMY = -2
+
+PERTURB_SHIFT = 5
+
+# Key storage modes: str objects, or UTF-8 bytes in a plain or front-coded arena
+KEY_STORAGES = ('object', 'arena', 'front_coded')
+
+
+class HashMap:
+    def __init__(self,
+                 capacity: int = 8,
+                 function: callable = hash_function_1,
+                 key_storage: str = 'object') -> None:
+        """
+        Initialize new HashMap that keeps a sparse index table
+        pointing into dense, insertion-ordered entry arrays.
+        key_storage 'arena' or 'front_coded' keeps str keys UTF-8 encoded
+        in a KeyArena instead of as str objects
+        """
+        if key_storage not in KEY_STORAGES:
+            raise ValueError(f"unknown key storage: {key_storage}")
+        self._key_storage = key_storage
+        if key_storage != 'object':
+            # Arena keys are compared as bytes; bind that probe per instance
+            self._lookup = self._lookup_encoded
+
+        # capacity must be a power of two
+        self._capacity = self._next_power_of_two(max(capacity, 8))
+        self._indices = self._new_indices(self._capacity)
+
+        # Dense arrays; a removed entry leaves a None hash behind
+        self._hashes = DynamicArray()
+        self._keys = self._new_keys()
+        self._values = DynamicArray()
+
+        self._hash_function = function
+        self._size = 0
+
+    def __str__(self) -> str:
+        """
+        Override string method to provide more readable output
+        """
+        out = ''
+        for i in range(self._hashes.length()):
+            if self._hashes[i] is not None:
+                out += str(i) + ': ' + str(self._keys[i]) + ': ' + str(self._values[i]) + '\n'
+        return out
+
+    @staticmethod
+    def _next_power_of_two(capacity: int) -> int:
+        """
+        Return the smallest power of two not less than the given number
+        """
+        power = 1
+        while power < capacity:
+            power *= 2
+        return power
+
+    @staticmethod
+    def _new_indices(capacity: int) -> array:
+        """
+        Return an index table of empty slots using the narrowest
+        signed integer type that can address capacity entries
+        """
+        if capacity <= 0x80:
+            typecode = 'b'
+        elif capacity <= 0x8000:
+            typecode = 'h'
+        elif capacity <= 0x80000000:
+            typecode = 'i'
+        else:
+            typecode = 'q'
+        return array(typecode, [EMPTY]) * capacity
+
+    def _new_keys(self) -> DynamicArray:
+        """
+        Return an empty dense key array for the key storage mode
+        """
+        if self._key_storage == 'arena':
+            return KeyArena()
+        if self._key_storage == 'front_coded':
+            return FrontCodedKeyArena()
+        return DynamicArray()
+
+    def _usable(self) -> int:
+        """
+        Return number of dense entries allowed before the index is rebuilt
+        """
+        return (self._capacity * 2) // 3
+
+    def get_size(self) -> int:
+        """
+        Return size of map
+        """
+        return self._size
+
+    def get_capacity(self) -> int:
+        """
+        Return capacity of map
+        """
+        return self._capacity
+
+    # ------------------------------------------------------------------ #
+
+    def _lookup(self, key: str, hash_value: int) -> int:
+        """
+        Return the index slot that holds key, or the empty slot ending its probe
+        """
+        indices = self._indices
+        hashes = self._hashes._data
+        keys = self._keys._data
+        mask = self._capacity - 1
+        perturb = hash_value & 0xFFFFFFFFFFFFFFFF
+        slot = perturb & mask
+        # An index table is never full, so the probe always ends
+        while True:
+            position = indices[slot]
+            if position == EMPTY:
+                return slot
+            if position >= 0 and hashes[position] == hash_value and keys[position] == key:
+                return slot
+            perturb >>= PERTURB_SHIFT
+            slot = (slot * 5 + perturb + 1) & mask
+
+    def _lookup_encoded(self, key: str, hash_value: int) -> int:
+        """
+        Return the index slot that holds key, comparing its UTF-8 bytes
+        against the key arena, or the empty slot ending its probe
+        """
+        indices = self._indices
+        hashes = self._hashes._data
+        keys = self._keys
+        encoded = key.encode('utf-8', 'surrogatepass')
+        mask = self._capacity - 1
+        perturb = hash_value & 0xFFFFFFFFFFFFFFFF
+        slot = perturb & mask
+        while True:
+            position = indices[slot]
+            if position == EMPTY:
+                return slot
+            if position >= 0 and hashes[position] == hash_value and keys.matches(position, encoded):
+                return slot
+            perturb >>= PERTURB_SHIFT
+            slot = (slot * 5 + perturb + 1) & mask
+
+    def put(self, key: str, value: object) -> None:
+        """
+        Update a key/value pair in the hash map
+        """
+        hash_value = self._hash_function(key)
+        slot = self._lookup(key, hash_value)
+        position = self._indices[slot]
+        # Update in place
+        if position >= 0:
+            self._values[position] = value
+            return
+        # Append to the dense arrays and point the empty slot at it
+        self._indices[slot] = self._hashes.length()
+        self._hashes.append(hash_value)
+        self._keys.append(key)
+        self._values.append(value)
+        self._size += 1
+        # Removed entries count against usable space until the rebuild
+        if self._hashes.length() >= self._usable():
+            self.resize_table(self._size * 3)
+
+    def table_load(self) -> float:
+        """
+        Returns current load factor
+        """
+        return self._size / self._capacity
+
+    def empty_buckets(self) -> int:
+        """
+        Return number of empty slots in the index table
+        """
+        empty_count = 0
+        for i in range(self._capacity):
+            if self._indices[i] == EMPTY:
+                empty_count += 1
+        return empty_count
+
+    def resize_table(self, new_capacity: int) -> None:
+        """
+        Rebuild the index table with the given capacity from the stored
+        hashes, compacting the dense arrays if entries were removed
+        """
+        # Keep the rebuilt table under the usable load
+        new_capacity = self._next_power_of_two(max(new_capacity, (self._size * 3) // 2 + 1, 8))
+        if self._size != self._hashes.length():
+            self._compact()
+
+        indices = self._new_indices(new_capacity)
+        mask = new_capacity - 1
+        hashes = self._hashes._data
+        # No key is rehashed; only slots are reassigned
+        for position in range(self._size):
+            perturb = hashes[position] & 0xFFFFFFFFFFFFFFFF
+            slot = perturb & mask
+            while indices[slot] != EMPTY:
+                perturb >>= PERTURB_SHIFT
+                slot = (slot * 5 + perturb + 1) & mask
+            indices[slot] = position
+
+        self._capacity = new_capacity
+        self._indices = indices
+
+    def compact(self) -> None:
+        """
+        Drop removed entries from the dense arrays and reclaim the arena
+        bytes of removed keys, keeping the capacity
+        """
+        if self._size != self._hashes.length():
+            self.resize_table(self._capacity)
+
+    def _compact(self) -> None:
+        """
+        Drop removed entries from the dense arrays, keeping insertion order.
+        A key arena is rebuilt too, reclaiming the bytes of removed keys
+        """
+        hashes, keys, values = DynamicArray(), self._new_keys(), DynamicArray()
+        for i in range(self._hashes.length()):
+            if self._hashes[i] is not None:
+                hashes.append(self._hashes[i])
+                keys.append(self._keys[i])
+                values.append(self._values[i])
+        self._hashes, self._keys, self._values = hashes, keys, values
+
+    def get(self, key: str, default: object = None) -> object:
+        """
+        Returns value associated with a given key, or default if not found
+        """
+        position = self._indices[self._lookup(key, self._hash_function(key))]
+        if position < 0:
+            return default
+        return self._values[position]
+
+    def contains_key(self, key: str) -> bool:
+        """
+        Returns whether a key is in the hash map
+        """
+        return self._indices[self._lookup(key, self._hash_function(key))] >= 0
+
+    def remove(self, key: str) -> None:
+        """
+        Remove the given key and its value from the hash map
+        """
+        slot = self._lookup(key, self._hash_function(key))
+        position = self._indices[slot]
+        if position < 0:
+            return
+        # Keep the probe chain intact and leave a hole in the dense arrays
+        self._indices[slot] = DUMMY
+        self._hashes[position] = None
+        # Arena bytes stay until compact() or the next resize
+        if self._key_storage == 'object':
+            self._keys[position] = None
+        self._values[position] = None
+        self._size -= 1
+
+    def clear(self) -> None:
+        """
+        Clears the contents of the hash map
+        """
+        self._indices = self._new_indices(self._capacity)
+        self._hashes = DynamicArray()
+        self._keys = self._new_keys()
+        self._values = DynamicArray()
+        self._size = 0
+
+    def get_keys_and_values(self) -> DynamicArray:
+        """
+        Returns array of key/value pairs in insertion order
+        """
+        result = DynamicArray()
+        hashes = self._hashes._data
+        keys = self._keys._data if self._key_storage == 'object' else self._keys
+        # Only the dense arrays are walked, never the index table
+        for i in range(self._hashes.length()):
+            if hashes[i] is not None:
+                result.append((keys[i], self._values._data[i]))
+        return result
+
+    def __iter__(self):
+        """
+        Iterates itself over the hash map in insertion order
+        """
+        self._iter_index = 0
+        return self
+
+    def __next__(self):
+        """
+        Returns next item in the hash map as a new HashEntry
+        """
+        while self._iter_index < self._hashes.length():
+            position = self._iter_index
+            self._iter_index += 1
+            if self._hashes[position] is not None:
+                return HashEntry(self._keys[position], self._values[position])
+        raise StopIteration
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+
+    print("\nCompact - put and resize")
+    print("------------------------")
+    m = HashMap(8, hash_function_1)
+    for i in range(150):
+        m.put('str' + str(i), i * 100)
+        if i % 25 == 24:
+            print(m.empty_buckets(), round(m.table_load(), 2), m.get_size(), m.get_capacity())
+
+    print("\nCompact - remove and insertion order")
+    print("------------------------------------")
+    m = HashMap(8, hash_function_2)
+    for i in range(1, 6):
+        m.put(str(i), str(i * 10))
+    m.remove('2')
+    m.put('20', '200')
+    m.put('1', '11')
+    print(m.get_keys_and_values())
+    m.resize_table(2)
+    print(m.get_keys_and_values(), m.get_capacity(), m.contains_key('2'), m.get('20'))
+
+    print("\nCompact - front-coded key arena")
+    print("-------------------------------")
+    m = HashMap(8, hash_function_1, 'front_coded')
+    for i in range(150):
+        m.put('key' + str(i), i)
+    for i in range(0, 150, 2):
+        m.remove('key' + str(i))
+    print(m.get_size(), m._keys.length(), m._keys.nbytes(), m.get('key7'), m.contains_key('key8'))
+    m.compact()
+    print(m.get_size(), m.get_capacity(), m._keys.length(), m._keys.nbytes(), m.get('key7'))
+    m.resize_table(64)
+    print(m.get_size(), m._keys.length(), m._keys.nbytes(), m.get('key149'))
+
+    print("\nCompact - __iter__(), __next__()")
+    print("--------------------------------")
+    for item in m:
+        print('K:', item.key, 'V:', item.value)
@@ -0,0 +1,227 @@
+import json
+import time
+
+from a6_include import DynamicArray
+
+# Map methods that are timed once a slow-operation threshold is set
+TIMED_OPERATIONS = ('put', 'get', 'contains_key', 'remove')
+
+
+class HashMapEvent:
+    """
+    Event passed to hook callbacks. kind is one of 'resize_start',
+    'resize_end', 'tombstone_purge' or 'slow_operation'
+    """
+
+    def __init__(self, kind: str, engine: str, **details) -> None:
+        """
+        Initialize an event stamped with the current wall-clock time
+        """
+        self.kind = kind
+        self.engine = engine
+        self.timestamp = time.time()
+        self.details = details
+
+    def __str__(self) -> str:
+        """
+        Override string method to provide more readable output
+        """
+        return f"{self.kind} {self.engine} {self.details}"
+
+    def as_dict(self) -> dict:
+        """
+        Return the event as a flat dictionary
+        """
+        record = {'kind': self.kind, 'engine': self.engine, 'timestamp': self.timestamp}
+        record.update(self.details)
+        return record
+
+
+class HookSet:
+    """
+    Callbacks registered on one HashMap. Created on the first add_hook(),
+    so maps without hooks only pay for a None check inside resize_table()
+    """
+
+    def __init__(self, hash_map) -> None:
+        """
+        Initialize an empty hook set for a map
+        """
+        self._map = hash_map
+        self._engine = type(hash_map).__module__
+        self._callbacks = DynamicArray()
+        self._thresholds = DynamicArray()
+        self.slow_threshold = None
+
+    def add(self, callback: callable, slow_threshold: float = None) -> None:
+        """
+        Register a callback; operations slower than slow_threshold
+        seconds are reported to it
+        """
+        self._callbacks.append(callback)
+        self._thresholds.append(slow_threshold)
+        self._update_timing()
+
+    def remove(self, callback: callable) -> None:
+        """
+        Unregister a callback
+        """
+        callbacks, thresholds = DynamicArray(), DynamicArray()
+        for i in range(self._callbacks.length()):
+            if self._callbacks[i] is not callback:
+                callbacks.append(self._callbacks[i])
+                thresholds.append(self._thresholds[i])
+        self._callbacks, self._thresholds = callbacks, thresholds
+        self._update_timing()
+
+    def is_empty(self) -> bool:
+        """
+        Determine if no callbacks remain
+        """
+        return self._callbacks.length() == 0
+
+    def _update_timing(self) -> None:
+        """
+        Install or drop the per-instance timing wrappers to match thresholds
+        """
+        self.slow_threshold = None
+        for i in range(self._thresholds.length()):
+            threshold = self._thresholds[i]
+            if threshold is not None and (self.slow_threshold is None or
+                                          threshold < self.slow_threshold):
+                self.slow_threshold = threshold
+        for operation in TIMED_OPERATIONS:
+            timed = operation in vars(self._map)
+            if self.slow_threshold is not None and not timed:
+                setattr(self._map, operation, self._timed(operation))
+            elif self.slow_threshold is None and timed:
+                delattr(self._map, operation)
+
+    def _timed(self, operation: str) -> callable:
+        """
+        Return the map's bound method wrapped with a slow-operation timer
+        """
+        method = getattr(type(self._map), operation).__get__(self._map)
+
+        def timed(key, *args):
+            # Measured first, so the event shows the walk this call makes
+            # rather than the table it leaves behind
+            probes = self._map._probe_length(key)
+            start = time.perf_counter()
+            result = method(key, *args)
+            duration = time.perf_counter() - start
+            if duration >= self.slow_threshold:
+                self.slow_operation(operation, key, duration, probes)
+            return result
+
+        return timed
+
+    def emit(self, kind: str, slow_duration: float = None, **details) -> None:
+        """
+        Send a new event to every callback; slow events only reach
+        callbacks whose threshold the duration meets
+        """
+        event = HashMapEvent(kind, self._engine, **details)
+        for i in range(self._callbacks.length()):
+            threshold = self._thresholds[i]
+            if slow_duration is None or (threshold is not None and slow_duration >= threshold):
+                self._callbacks[i](event)
+
+    def resize_started(self, old_capacity: int, new_capacity: int) -> float:
+        """
+        Report a resize and return its start time
+        """
+        self.emit('resize_start', old_capacity=old_capacity,
+                  new_capacity=new_capacity, size=self._map.get_size())
+        return time.perf_counter()
+
+    def resize_finished(self, old_capacity: int, new_capacity: int,
+                        moved: int, start: float) -> None:
+        """
+        Report a completed resize
+        """
+        self.emit('resize_end', old_capacity=old_capacity, new_capacity=new_capacity,
+                  moved=moved, duration=time.perf_counter() - start)
+
+    def tombstones_purged(self, purged: int, capacity: int) -> None:
+        """
+        Report tombstones dropped while rebuilding an open addressing table
+        """
+        self.emit('tombstone_purge', purged=purged, capacity=capacity)
+
+    def slow_operation(self, operation: str, key: object, duration: float,
+                       probes: int) -> None:
+        """
+        Report an operation that exceeded the slow threshold, with the
+        probe or chain length the map had when the operation started
+        """
+        self.emit('slow_operation', slow_duration=duration, operation=operation,
+                  key=key, duration=duration, probes=probes)
+
+
+class JsonLinesHook:
+    """
+    Hook callback that appends every event to a file as one JSON object per line
+    """
+
+    def __init__(self, path: str, flush: bool = True) -> None:
+        """
+        Open path for appending; flush writes each event through immediately
+        """
+        self._file = open(path, 'a', encoding='utf-8')
+        self._flush = flush
+
+    def __call__(self, event: HashMapEvent) -> None:
+        """
+        Write one event
+        """
+        self._file.write(json.dumps(event.as_dict(), default=str) + '\n')
+        if self._flush:
+            self._file.flush()
+
+    def close(self) -> None:
+        """
+        Close the underlying file
+        """
+        self._file.close()
+
+    def __enter__(self) -> "JsonLinesHook":
+        """
+        Use the hook as a context manager
+        """
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        """
+        Close the file when leaving the context
+        """
+        self.close()
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+    from a6_include import hash_function_1
+    import hash_map_oa
+    import hash_map_sc
+
+    print("\nHooks - resize events")
+    print("---------------------")
+    m = hash_map_sc.HashMap(11, hash_function_1)
+    m.add_hook(print)
+    for i in range(30):
+        m.put('str' + str(i), i)
+
+    print("\nHooks - tombstone purge and slow operations")
+    print("-------------------------------------------")
+    m = hash_map_oa.HashMap(11, hash_function_1)
+    for i in range(5):
+        m.put('key' + str(i), i)
+    m.remove('key1')
+    hook = lambda event: print(event.kind, event.details.get('purged'),
+                               event.details.get('operation'))
+    m.add_hook(hook, 0.0)
+    m.resize_table(23)
+    m.get('key2')
+    m.remove_hook(hook)
+    print('put' in vars(m))
@@ -1,22 +1,50 @@
 from a6_include import (DynamicArray, DynamicArrayException, HashEntry,
                         hash_function_1, hash_function_2)
+from frozen_hash_map import FrozenHashMap
+from hash_map_hooks import HookSet
+from hash_map_pickle import (gc_paused, pack_buffer, pack_ints, pack_keys,
+                             pack_values, unpack_array, unpack_keys, unpack_values)
+from int_hash_map import mix64
+from shared_hash_map import SharedHashMap
 
 
 class HashMap:
-    def __init__(self, capacity: int, function) -> None:
-        """
-        Initialize new HashMap that uses
-        quadratic probing for collision resolution
-        """
+    _PROBES = ('quadratic', 'linear', 'double', 'triangular')
+
+    def __init__(self,
+                 capacity: int,
+                 function,
+                 probe: str = 'quadratic',
+                 max_load: float = 0.5) -> None:
+        """
+        Initialize new HashMap that uses open addressing
+        for collision resolution. The probe sequence is one of
+        'quadratic', 'linear', 'double' or 'triangular'
+        """
+        if probe not in self._PROBES:
+            raise ValueError(f"unknown probe strategy: {probe}")
+        # Quadratic probing only reaches half of a prime table
+        if probe == 'quadratic' and not 0 < max_load <= 0.5:
+            raise ValueError("max_load must be in (0, 0.5] for quadratic probing")
+        if not 0 < max_load < 1:
+            raise ValueError("max_load must be in (0, 1)")
+        self._probe = probe
+        self._max_load = max_load
+
         self._buckets = DynamicArray()
 
-        # capacity must be a prime number
-        self._capacity = self._next_prime(capacity)
+        # capacity must be a prime number, or a power of two when
+        # triangular probing is used
+        if probe == 'triangular':
+            self._capacity = self._next_power_of_two(capacity)
+        else:
+            self._capacity = self._next_prime(capacity)
         for _ in range(self._capacity):
             self._buckets.append(None)
 
         self._hash_function = function
         self._size = 0
+        self._hooks = None
 
     def __str__(self) -> str:
         """
@@ -27,6 +55,56 @@ class HashMap:
             out += str(i) + ': ' + str(self._buckets[i]) + '\n'
         return out
 
+    def __reduce_ex__(self, protocol: int):
+        """
+        Pickle as flat key, value, slot and tombstone columns, which protocol 5
+        can pass as out-of-band buffers. Hooks are not pickled
+        """
+        keys, values, slots = [], [], []
+        tombstones = bytearray()
+        for i, entry in enumerate(self._buckets._data):
+            if entry is not None:
+                keys.append(entry.key)
+                values.append(entry.value)
+                slots.append(i)
+                tombstones.append(entry.is_tombstone)
+        # Lets the receiver detect a hash function that differs between processes
+        check = self._hash_function(keys[0]) if keys else None
+        return (HashMap._from_columns,
+                (self._hash_function, self._probe, self._max_load, self._capacity,
+                 check, pack_keys(keys, protocol), pack_values(values, protocol),
+                 pack_ints(slots, protocol), pack_buffer(tombstones, protocol)))
+
+    @classmethod
+    def _from_columns(cls, function: callable, probe: str, max_load: float,
+                      capacity: int, check: int, keys: tuple, values: tuple,
+                      slots: tuple, tombstones) -> "HashMap":
+        """
+        Rebuild a pickled map from its columns, reusing the stored slots and
+        tombstones unless the hash function changed (hash() of str is salted per process)
+        """
+        keys, values = unpack_keys(keys), unpack_values(values)
+        tombstones = bytes(tombstones)
+        with gc_paused():
+            result = cls(capacity, function, probe, max_load)
+            if keys and function(keys[0]) != check:
+                for i in range(len(keys)):
+                    if not tombstones[i]:
+                        result.put(keys[i], values[i])
+                return result
+
+            slots = unpack_array(slots)
+            buckets = result._buckets._data
+            for slot, key, value in zip(slots, keys, values):
+                buckets[slot] = HashEntry(key, value)
+            # Tombstones are rare, so find them instead of testing every entry
+            i = tombstones.find(1)
+            while i >= 0:
+                buckets[slots[i]].is_tombstone = True
+                i = tombstones.find(1, i + 1)
+            result._size = len(keys) - tombstones.count(1)
+        return result
+
     def _next_prime(self, capacity: int) -> int:
         """
         Increment from given number to find the closest prime number
@@ -58,6 +136,36 @@ class HashMap:
 
         return True
 
+    @staticmethod
+    def _next_power_of_two(capacity: int) -> int:
+        """
+        Return the smallest power of two not less than the given number
+        """
+        power = 1
+        while power < capacity:
+            power *= 2
+        return power
+
+    def _probe_start(self, hash_value: int, capacity: int) -> tuple[int, int, int]:
+        """
+        Return home index, first step and step increment of a probe sequence.
+        Each probe advances the index by step, then grows step by the increment
+        """
+        index = hash_value % capacity
+        if self._probe == 'quadratic':
+            # i ** 2 grows by 1, 3, 5, ...
+            return index, 1, 2
+        if self._probe == 'linear':
+            return index, 1, 0
+        if self._probe == 'triangular':
+            # i * (i + 1) / 2 grows by 1, 2, 3, ...
+            return index, 1, 1
+        # Double hashing: any step below a prime capacity reaches every slot.
+        # The step comes from a scrambled copy of the hash, because
+        # hash_value // capacity is 0 for the small sums the bundled
+        # functions return, which would make every step 1
+        return index, 1 + mix64(hash_value) % max(capacity - 1, 1), 0
+
     def get_size(self) -> int:
         """
         Return size of map
@@ -76,25 +184,43 @@ class HashMap:
         """
         Update a key/value pair in the hash map.
         """
-        index = self._hash_function(key) % self._capacity
+        self._put_hashed(key, value, self._hash_function(key))
+
+    def _put_hashed(self, key: str, value: object, hash_value: int) -> None:
+        """
+        Update a key/value pair whose hash has already been computed
+        """
+        index, step, increment = self._probe_start(hash_value, self._capacity)
+        free_index = None
         i = 0
-        # Quadratic probe
         while i < self._capacity:
-            probe_index = (index + i ** 2) % self._capacity
-            entry = self._buckets[probe_index]
-            # Check for tombstone or empty, then insert and increment
-            if entry is None or entry.is_tombstone:
-                self._buckets[probe_index] = HashEntry(key, value)
-                self._size += 1
-                # Load factor verifier
-                if self.table_load() >= 0.5:
-                    self.resize_table(self._capacity * 2)
-                return
-            # Update
+            entry = self._buckets[index]
+            # Remember the first reusable slot, stop at an empty one
+            if entry is None:
+                if free_index is None:
+                    free_index = index
+                break
+            if entry.is_tombstone:
+                if free_index is None:
+                    free_index = index
+            # Update, the key may sit past a tombstone
             elif entry.key == key:
                 entry.value = value
                 return
+            index = (index + step) % self._capacity
+            step += increment
             i += 1
+        # The probe reached no free slot; rebuild without tombstones, larger
+        if free_index is None:
+            self.resize_table(self._capacity * 2)
+            self._put_hashed(key, value, hash_value)
+            return
+        # Insert into the tombstone or empty slot and increment
+        self._buckets[free_index] = HashEntry(key, value)
+        self._size += 1
+        # Load factor verifier
+        if self.table_load() >= self._max_load:
+            self.resize_table(self._capacity * 2)
 
     def table_load(self) -> float:
         """
@@ -115,72 +241,115 @@ class HashMap:
 
     def resize_table(self, new_capacity: int) -> None:
         """
-        Change the capacity of the hash table
+        Change the capacity of the hash table. The capacity is raised
+        as needed to keep the load below max_load
         """
         if new_capacity < self._size:
             return
         # Adjust capacity
-        if not self._is_prime(new_capacity):
-            new_capacity = self._next_prime(new_capacity)
-        new_buckets = DynamicArray([None] * new_capacity)
-        old_buckets = self._buckets
-        self._buckets = new_buckets
-        # Store old and reset when reinserting
-        old_size = self._size
-        self._size = 0
-        # Determine non-None and non-tombstone, Quadratic probe
-        for i in range(old_buckets.length()):
-            entry = old_buckets.get_at_index(i)
-            if entry and not entry.is_tombstone:
-                index = self._hash_function(entry.key) % new_capacity
-                i = 0
-                while i < new_capacity:
-                    probe_index = (index + i ** 2) % new_capacity
-                    new_entry = new_buckets.get_at_index(probe_index)
-                    # Increment for each reinsertion
-                    if new_entry is None:
-                        new_buckets.set_at_index(probe_index, entry)
-                        self._size += 1 
-                        i = new_capacity
-                    i += 1
+        new_capacity = self._usable_capacity(max(new_capacity, int(self._size / self._max_load) + 1))
+        hooks, old_capacity = self._hooks, self._capacity
+        if hooks is not None:
+            start = hooks.resize_started(old_capacity, new_capacity)
+        purged = 0
+        for i in range(self._buckets.length()):
+            entry = self._buckets.get_at_index(i)
+            if entry and entry.is_tombstone:
+                purged += 1
+        # Grow again if some entry's probe reaches no free slot
+        new_buckets = self._rehashed(new_capacity)
+        while new_buckets is None:
+            new_capacity = self._usable_capacity(new_capacity * 2)
+            new_buckets = self._rehashed(new_capacity)
         # Update hash and new value
         self._capacity = new_capacity
         self._buckets = new_buckets
+        if hooks is not None:
+            if purged:
+                hooks.tombstones_purged(purged, new_capacity)
+            hooks.resize_finished(old_capacity, new_capacity, self._size, start)
+
+    def _usable_capacity(self, capacity: int) -> int:
+        """
+        Return the smallest capacity not below the given one that
+        the probe strategy accepts
+        """
+        if self._probe == 'triangular':
+            return self._next_power_of_two(capacity)
+        if not self._is_prime(capacity):
+            return self._next_prime(capacity)
+        return capacity
+
+    def _rehashed(self, new_capacity: int) -> DynamicArray:
+        """
+        Return a table of new_capacity holding every live entry,
+        or None if some entry's probe reaches no free slot
+        """
+        new_buckets = DynamicArray([None] * new_capacity)
+        # Determine non-None and non-tombstone, then probe for a free slot
+        for i in range(self._buckets.length()):
+            entry = self._buckets.get_at_index(i)
+            if entry and not entry.is_tombstone:
+                index, step, increment = self._probe_start(
+                    self._hash_function(entry.key), new_capacity)
+                probes = 0
+                while new_buckets.get_at_index(index) is not None:
+                    index = (index + step) % new_capacity
+                    step += increment
+                    probes += 1
+                    if probes == new_capacity:
+                        return None
+                new_buckets.set_at_index(index, entry)
+        return new_buckets
+
+    def get_entry(self, key: str) -> HashEntry:
+        """
+        Returns the live entry for a given key, or None if not found
+        """
+        return self._find_entry(key, self._hash_function(key))
 
-    def get(self, key: str) -> object:
+    def _find_entry(self, key: str, hash_value: int) -> HashEntry:
         """
-        Returns value associated with a given key
+        Returns the live entry for a key whose hash has already been computed
         """
-        index = self._hash_function(key) % self._capacity
+        index, step, increment = self._probe_start(hash_value, self._capacity)
         i = 0
-        # Quadratic probe
         while i < self._capacity:
-            probe_index = (index + i ** 2) % self._capacity
-            entry = self._buckets[probe_index]
+            entry = self._buckets[index]
             # Return none if not found, return matching if found
             if entry is None:
                 return None
             if entry.key == key and not entry.is_tombstone:
-                return entry.value
+                return entry
+            index = (index + step) % self._capacity
+            step += increment
             i += 1
         return None
 
+    def get(self, key: str, default: object = None) -> object:
+        """
+        Returns value associated with a given key, or default if not found
+        """
+        entry = self.get_entry(key)
+        if entry is None:
+            return default
+        return entry.value
+
     def contains_key(self, key: str) -> bool:
         """
         Returns whether a key is in the hash map
         """
-        return self.get(key) is not None
+        return self.get_entry(key) is not None
 
     def remove(self, key: str) -> None:
         """
         Remove the given key and its value from the hash map 
         """
-        index = self._hash_function(key) % self._capacity
+        index, step, increment = self._probe_start(self._hash_function(key),
+                                                   self._capacity)
         i = 0
-        # Quadratic probe
         while i < self._capacity:
-            probe_index = (index + i ** 2) % self._capacity
-            entry = self._buckets[probe_index]
+            entry = self._buckets[index]
             # Mark as tombstone, decrement size, and move to next
             if entry is None:
                 return
@@ -188,6 +357,8 @@ class HashMap:
                 entry.is_tombstone = True
                 self._size -= 1
                 return
+            index = (index + step) % self._capacity
+            step += increment
             i += 1
 
     def clear(self) -> None:
@@ -228,6 +399,137 @@ class HashMap:
                 return entry
         raise StopIteration
 
+    def add_hook(self, callback: callable, slow_threshold: float = None) -> None:
+        """
+        Register callback to receive HashMapEvent objects for resizes, tombstone purges
+        and, if slow_threshold is given, operations slower than that many seconds
+        """
+        if self._hooks is None:
+            self._hooks = HookSet(self)
+        self._hooks.add(callback, slow_threshold)
+
+    def remove_hook(self, callback: callable) -> None:
+        """
+        Unregister a callback, restoring the untimed methods once none remain
+        """
+        if self._hooks is None:
+            return
+        self._hooks.remove(callback)
+        if self._hooks.is_empty():
+            self._hooks = None
+
+    def _probe_length(self, key: str) -> int:
+        """
+        Return number of slots a lookup of key probes
+        """
+        index, step, increment = self._probe_start(self._hash_function(key),
+                                                   self._capacity)
+        probes = 1
+        while probes < self._capacity:
+            entry = self._buckets[index]
+            if entry is None or (entry.key == key and not entry.is_tombstone):
+                break
+            index = (index + step) % self._capacity
+            step += increment
+            probes += 1
+        return probes
+
+    # ------------------------------------------------------------------ #
+
+    def _empty_copy(self) -> "HashMap":
+        """
+        Returns an empty hash map with the same configuration
+        """
+        return HashMap(self._capacity, self._hash_function,
+                       self._probe, self._max_load)
+
+    def _reserve(self, size: int) -> None:
+        """
+        Resize once so that size entries fit without further resizes
+        """
+        if size >= self._capacity * self._max_load:
+            self.resize_table(int(size / self._max_load) + 1)
+
+    def update(self, other: "HashMap") -> None:
+        """
+        Copies every key/value pair of other into the hash map,
+        replacing values of keys that already exist
+        """
+        self._reserve(self._size + other.get_size())
+        for i in range(other._buckets.length()):
+            entry = other._buckets.get_at_index(i)
+            if entry and not entry.is_tombstone:
+                self.put(entry.key, entry.value)
+
+    def union(self, other: "HashMap") -> "HashMap":
+        """
+        Returns new hash map with the pairs of both maps,
+        preferring values from other for shared keys
+        """
+        result = self._empty_copy()
+        result._reserve(self._size + other.get_size())
+        result.update(self)
+        result.update(other)
+        return result
+
+    def _filter(self, other: "HashMap", keep_shared: bool) -> "HashMap":
+        """
+        Returns new hash map with the pairs whose key presence
+        in other matches keep_shared
+        """
+        result = self._empty_copy()
+        same_function = self._hash_function is other._hash_function
+        for i in range(self._buckets.length()):
+            entry = self._buckets.get_at_index(i)
+            if entry and not entry.is_tombstone:
+                # Hash each key once and probe both maps with it
+                hash_value = self._hash_function(entry.key)
+                if same_function:
+                    found = other._find_entry(entry.key, hash_value)
+                else:
+                    found = other.get_entry(entry.key)
+                if (found is not None) == keep_shared:
+                    result._put_hashed(entry.key, entry.value, hash_value)
+        return result
+
+    def intersection(self, other: "HashMap") -> "HashMap":
+        """
+        Returns new hash map with the pairs whose key is also in other
+        """
+        return self._filter(other, True)
+
+    def difference(self, other: "HashMap") -> "HashMap":
+        """
+        Returns new hash map with the pairs whose key is not in other
+        """
+        return self._filter(other, False)
+
+    def keys_equal(self, other: "HashMap") -> bool:
+        """
+        Determines if both hash maps contain exactly the same keys
+        """
+        if self._size != other.get_size():
+            return False
+        for i in range(self._buckets.length()):
+            entry = self._buckets.get_at_index(i)
+            if entry and not entry.is_tombstone:
+                if not other.contains_key(entry.key):
+                    return False
+        return True
+
+    def freeze(self) -> FrozenHashMap:
+        """
+        Returns read-only copy of the hash map backed by a minimal perfect hash
+        """
+        return FrozenHashMap(self.get_keys_and_values())
+
+    def share(self, name: str = None) -> SharedHashMap:
+        """
+        Returns read-only copy of the hash map published to shared memory,
+        which other processes can attach to by name
+        """
+        return SharedHashMap.publish(self.get_keys_and_values(), name)
+
 # ------------------- BASIC TESTING ---------------------------------------- #
 
 if __name__ == "__main__":
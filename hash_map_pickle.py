@@ -0,0 +1,153 @@
+import gc
+import pickle
+import sys
+from array import array
+from contextlib import contextmanager
+from itertools import accumulate
+
+from a6_include import DynamicArray
+
+# Protocol 5 can hand columns to the pickler as out-of-band buffers
+BUFFER_PROTOCOL = 5
+
+# Integer columns use the narrowest of these that fits
+INT_TYPECODES = ('b', 'h', 'i', 'q')
+
+
+@contextmanager
+def gc_paused():
+    """
+    Suspend the cyclic garbage collector while a map is rebuilt. The rebuild
+    allocates millions of nodes, each batch of which would otherwise trigger
+    a collection that rescans every live object
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def pack_buffer(data, protocol: int) -> object:
+    """
+    Wrap a bytes-like column so protocol 5 can pass it out of band
+    """
+    if protocol >= BUFFER_PROTOCOL:
+        return pickle.PickleBuffer(data)
+    return bytes(data)
+
+
+def pack_array(column: array, protocol: int) -> tuple:
+    """
+    Return a typed array column, stored little-endian
+    """
+    if sys.byteorder == 'big':
+        column.byteswap()
+    return column.typecode, pack_buffer(column, protocol)
+
+
+def unpack_array(column: tuple) -> list:
+    """
+    Return the values of a typed array column as a list
+    """
+    typecode, data = column
+    values = array(typecode)
+    # Out-of-band buffers keep the item format they were pickled with
+    values.frombytes(memoryview(data).cast('B'))
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values.tolist()
+
+
+def pack_ints(values: list, protocol: int) -> tuple:
+    """
+    Return an integer column in the narrowest typecode holding every value.
+    Raises OverflowError for values outside int64
+    """
+    low, high = (min(values), max(values)) if values else (0, 0)
+    for typecode in INT_TYPECODES:
+        bits = 8 * array(typecode).itemsize
+        if -(1 << (bits - 1)) <= low and high < 1 << (bits - 1):
+            return pack_array(array(typecode, values), protocol)
+    raise OverflowError("integer column exceeds int64")
+
+
+def pack_keys(keys: list, protocol: int) -> tuple:
+    """
+    Return a key column: str keys as one UTF-8 blob with character offsets,
+    any other keys as a DynamicArray
+    """
+    if not all(type(key) is str for key in keys):
+        return None, DynamicArray(keys)
+    text = ''.join(keys)
+    offsets = list(accumulate(map(len, keys), initial=0))
+    return (pack_buffer(text.encode('utf-8', 'surrogatepass'), protocol),
+            pack_ints(offsets, protocol))
+
+
+def unpack_keys(column: tuple) -> list:
+    """
+    Return the keys of a key column as a list
+    """
+    blob, offsets = column
+    if blob is None:
+        return offsets._data
+    # Decode once, then slice by character offsets
+    text = str(blob, 'utf-8', 'surrogatepass')
+    offsets = unpack_array(offsets)
+    return [text[start:end] for start, end in zip(offsets, offsets[1:])]
+
+
+def pack_values(values: list, protocol: int) -> tuple:
+    """
+    Return a value column: a typed array when every value is an int64
+    or every value is a float, otherwise a DynamicArray
+    """
+    kinds = set(map(type, values))
+    if kinds == {int}:
+        try:
+            return pack_ints(values, protocol)
+        except OverflowError:
+            pass
+    elif kinds == {float}:
+        return pack_array(array('d', values), protocol)
+    return None, DynamicArray(values)
+
+
+def unpack_values(column: tuple) -> list:
+    """
+    Return the values of a value column as a list
+    """
+    typecode, data = column
+    if typecode is None:
+        return data._data
+    return unpack_array(column)
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+    from a6_include import hash_function_1
+    import hash_map_oa
+    import hash_map_sc
+
+    print("\nColumnar pickling - separate chaining")
+    print("-------------------------------------")
+    m = hash_map_sc.HashMap(53, hash_function_1)
+    for i in range(150):
+        m.put('str' + str(i), i * 100)
+    buffers = []
+    data = pickle.dumps(m, protocol=5, buffer_callback=buffers.append)
+    copy = pickle.loads(data, buffers=buffers)
+    print(len(data), len(buffers), copy.get_size(), copy.get_capacity(), copy.get('str7'))
+
+    print("\nColumnar pickling - open addressing")
+    print("-----------------------------------")
+    m = hash_map_oa.HashMap(53, hash_function_1)
+    for i in range(50):
+        m.put('key' + str(i), i / 2)
+    m.remove('key1')
+    copy = pickle.loads(pickle.dumps(m, protocol=4))
+    print(copy.get_size(), copy.get_capacity(), copy.get('key2'), copy.contains_key('key1'))
@@ -1,5 +1,143 @@
-from a6_include import (DynamicArray, LinkedList,
+from a6_include import (DynamicArray, LinkedList, SLNode,
                         hash_function_1, hash_function_2)
+from frozen_hash_map import FrozenHashMap
+from hash_map_hooks import HookSet
+from hash_map_pickle import (gc_paused, pack_ints, pack_keys, pack_values,
+                             unpack_array, unpack_keys, unpack_values)
+from heavy_hitters import CountMinSketch
+from int_hash_map import IntHashMap
+from numpy_mode import find_mode_numpy
+from shared_hash_map import SharedHashMap
+
+# A chain longer than this becomes a SortedBucket ...
+TREEIFY_THRESHOLD = 8
+# ... and turns back into a LinkedList once it shrinks to this length
+UNTREEIFY_THRESHOLD = 6
+
+
+class SortedBucket:
+    """
+    Bucket that keeps its nodes sorted by key for binary search
+    Supported methods match LinkedList: insert, remove, contains, length, iterator.
+    Keys must be ordered by <; inserting one that is not raises TypeError
+    and leaves the bucket unchanged
+    """
+
+    def __init__(self, chain: LinkedList = None) -> None:
+        """
+        Initialize new sorted bucket, optionally from the nodes of a chain.
+        Raises TypeError if the chain holds keys that cannot be ordered
+        """
+        self._nodes = DynamicArray()
+        if chain:
+            for node in chain:
+                self.insert(node.key, node.value)
+
+    def __str__(self) -> str:
+        """
+        Override string method to provide more readable output
+        """
+        content = ''
+        for node in self:
+            content += (' -> ' if content else '') + str(node)
+        return 'SRT [' + content + ']'
+
+    def __iter__(self):
+        """
+        Return an iterator over the nodes in key order
+        """
+        for i in range(self._nodes.length()):
+            yield self._nodes[i]
+
+    def _search(self, key: str) -> int:
+        """
+        Return index of the first node whose key is not less than key
+        """
+        low, high = 0, self._nodes.length()
+        while low < high:
+            middle = (low + high) // 2
+            if self._nodes[middle].key < key:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def insert(self, key: str, value: object) -> None:
+        """
+        Insert new node at its sorted position; key must not be present
+        """
+        index = self._search(key)
+        self._nodes.append(SLNode(key, value))
+        # Swap the new node down into place
+        for i in range(self._nodes.length() - 1, index, -1):
+            self._nodes.swap(i, i - 1)
+
+    def remove(self, key: str) -> bool:
+        """
+        Remove node with matching key.
+        Return True if removal was successful, False otherwise.
+        """
+        try:
+            index = self._search(key)
+        except TypeError:
+            index = self._scan(key)
+        if index == self._nodes.length() or self._nodes[index].key != key:
+            return False
+        # Swap the node up to the end and drop it
+        for i in range(index, self._nodes.length() - 1):
+            self._nodes.swap(i, i + 1)
+        self._nodes.pop()
+        return True
+
+    def contains(self, key: str) -> SLNode:
+        """Return node with matching key, or None if no match"""
+        try:
+            index = self._search(key)
+        except TypeError:
+            index = self._scan(key)
+        if index < self._nodes.length() and self._nodes[index].key == key:
+            return self._nodes[index]
+        return None
+
+    def _scan(self, key: str) -> int:
+        """
+        Return index of the node equal to key, or the length if there is
+        none, for lookup keys that cannot be ordered against the bucket
+        """
+        for i in range(self._nodes.length()):
+            if self._nodes[i].key == key:
+                return i
+        return self._nodes.length()
+
+    def length(self) -> int:
+        """Return the number of nodes in the bucket."""
+        return self._nodes.length()
+
+    def search_length(self, key: str) -> int:
+        """
+        Return number of nodes a lookup of key compares against
+        """
+        length = self._nodes.length()
+        try:
+            low, high, compared = 0, length, 0
+            while low < high:
+                middle = (low + high) // 2
+                compared += 1
+                if self._nodes[middle].key < key:
+                    low = middle + 1
+                else:
+                    high = middle
+        except TypeError:
+            return min(self._scan(key) + 1, length)
+        # The lower bound found is then checked for equality
+        return compared + (1 if low < length else 0)
+
+    def chain(self) -> LinkedList:
+        """Return the nodes as a plain LinkedList."""
+        chain = LinkedList()
+        for node in self:
+            chain.insert(node.key, node.value)
+        return chain
 
 
 class HashMap:
@@ -19,6 +157,7 @@ class HashMap:
 
         self._hash_function = function
         self._size = 0
+        self._hooks = None
 
     def __str__(self) -> str:
         """
@@ -29,6 +168,68 @@ class HashMap:
             out += str(i) + ': ' + str(self._buckets[i]) + '\n'
         return out
 
+    def __reduce_ex__(self, protocol: int):
+        """
+        Pickle as flat key, value and bucket index columns, which protocol 5
+        can pass as out-of-band buffers. Hooks are not pickled
+        """
+        keys, values, indices = [], [], []
+        for i, bucket in enumerate(self._buckets._data):
+            if isinstance(bucket, SortedBucket):
+                for node in bucket:
+                    keys.append(node.key)
+                    values.append(node.value)
+                    indices.append(i)
+                continue
+            # Walk plain chains directly rather than through iterator objects
+            node = bucket._head
+            while node:
+                keys.append(node.key)
+                values.append(node.value)
+                indices.append(i)
+                node = node.next
+        # Lets the receiver detect a hash function that differs between processes
+        check = self._hash_function(keys[0]) if keys else None
+        return (HashMap._from_columns,
+                (self._hash_function, self._capacity, check,
+                 pack_keys(keys, protocol), pack_values(values, protocol),
+                 pack_ints(indices, protocol)))
+
+    @classmethod
+    def _from_columns(cls, function: callable, capacity: int, check: int,
+                      keys: tuple, values: tuple, indices: tuple) -> "HashMap":
+        """
+        Rebuild a pickled map from its columns, reusing the stored bucket
+        indices unless the hash function changed (hash() of str is salted per process)
+        """
+        keys, values = unpack_keys(keys), unpack_values(values)
+        with gc_paused():
+            if keys and function(keys[0]) != check:
+                result = cls(capacity, function)
+                for i in range(len(keys)):
+                    result.put(keys[i], values[i])
+                return result
+
+            result = cls.__new__(cls)
+            result._capacity = capacity
+            result._hash_function = function
+            result._size = len(keys)
+            result._hooks = None
+            buckets = [LinkedList() for _ in range(capacity)]
+            result._buckets = DynamicArray(buckets)
+            long_chains = []
+            # Prepend backwards so every chain keeps its original order
+            for index, key, value in zip(reversed(unpack_array(indices)),
+                                         reversed(keys), reversed(values)):
+                chain = buckets[index]
+                chain._head = SLNode(key, value, chain._head)
+                chain._size += 1
+                if chain._size == TREEIFY_THRESHOLD + 1:
+                    long_chains.append(index)
+            for index in long_chains:
+                result._buckets._data[index] = result._treeified(buckets[index])
+        return result
+
     def _next_prime(self, capacity: int) -> int:
         """
         Increment from given number and the find the closest prime number
@@ -85,8 +286,8 @@ class HashMap:
         if node:
             node.value = value
         else:
-            bucket.insert(key, value)
             self._size += 1
+            self._insert_into(self._buckets, index, key, value)
         # Resize the table
         if self.table_load() > 1.0:
             self.resize_table(self._capacity * 2)
@@ -112,15 +313,10 @@ class HashMap:
         """
         Clears content of hash map
         """
-        # Get current bucket and start from head
-        for i in range(self._buckets.length()):
-            bucket = self._buckets._data[i]
-            current_node = bucket._head
-            # Store next node, remove current, and move to the next
-            while current_node:
-                next_node = current_node.next
-                bucket.remove(current_node.key)
-                current_node = next_node
+        # Replace every bucket, dropping sorted buckets as well
+        self._buckets = DynamicArray()
+        for _ in range(self._capacity):
+            self._buckets.append(LinkedList())
         self._size = 0
 
     def resize_table(self, new_capacity: int) -> None:
@@ -132,21 +328,23 @@ class HashMap:
         # Check prime and create new array
         if not self._is_prime(new_capacity):
             new_capacity = self._next_prime(new_capacity)
+        hooks, old_capacity = self._hooks, self._capacity
+        if hooks is not None:
+            start = hooks.resize_started(old_capacity, new_capacity)
         new_buckets = DynamicArray()
         # Initalize linked list
         for _ in range(new_capacity):
             new_buckets.append(LinkedList())
-        # Start at head, get new index, insert, and move to next
+        # Walk each bucket, get new index and insert
         for i in range(self._buckets.length()):
-            bucket = self._buckets._data[i]
-            current_node = bucket._head
-            while current_node:
-                new_index = self._hash_function(current_node.key) % new_capacity
-                new_buckets[new_index].insert(current_node.key, current_node.value)
-                current_node = current_node.next
+            for node in self._buckets._data[i]:
+                new_index = self._hash_function(node.key) % new_capacity
+                self._insert_into(new_buckets, new_index, node.key, node.value)
         # Update capacity
         self._capacity = new_capacity
         self._buckets = new_buckets
+        if hooks is not None:
+            hooks.resize_finished(old_capacity, new_capacity, self._size, start)
 
     def get(self, key: str):
         """
@@ -173,28 +371,235 @@ class HashMap:
         Removes a value from the hash map using its key
         """
         index = self._hash_function(key) % self._capacity
-        linked_list = self._buckets[index]
-        if linked_list.remove(key):
+        bucket = self._buckets[index]
+        if bucket.remove(key):
             self._size -= 1
+            # Shrunk sorted buckets go back to a plain chain
+            if bucket.length() <= UNTREEIFY_THRESHOLD and isinstance(bucket, SortedBucket):
+                self._buckets[index] = bucket.chain()
 
     def get_keys_and_values(self) -> DynamicArray:
         """
         Returns array that contains each key/value pair in the hash map
         """
         keys_and_values = DynamicArray()
-        # Start at head, append the pair, move to next
+        # Walk each bucket and append the pairs
         for i in range(self._capacity):
-            bucket = self._buckets._data[i]
-            current_node = bucket._head
-            while current_node:
-                keys_and_values.append((current_node.key, current_node.value))
-                current_node = current_node.next
+            for node in self._buckets._data[i]:
+                keys_and_values.append((node.key, node.value))
         return keys_and_values
 
+    @staticmethod
+    def _insert_into(buckets: DynamicArray, index: int, key: str, value: object) -> None:
+        """
+        Insert a new pair into a bucket, treeifying the bucket once its chain is too long
+        """
+        bucket = buckets._data[index]
+        if isinstance(bucket, SortedBucket):
+            try:
+                bucket.insert(key, value)
+                return
+            except TypeError:
+                # A key that cannot be ordered sends the bucket back to a chain
+                bucket = buckets._data[index] = bucket.chain()
+        bucket.insert(key, value)
+        if bucket.length() > TREEIFY_THRESHOLD:
+            buckets._data[index] = HashMap._treeified(bucket)
+
+    @staticmethod
+    def _treeified(chain: LinkedList) -> object:
+        """
+        Return the chain as a SortedBucket, or the chain itself
+        if its keys cannot be ordered
+        """
+        try:
+            return SortedBucket(chain)
+        except TypeError:
+            return chain
+
+    def add_hook(self, callback: callable, slow_threshold: float = None) -> None:
+        """
+        Register callback to receive HashMapEvent objects for resizes
+        and, if slow_threshold is given, operations slower than that many seconds
+        """
+        if self._hooks is None:
+            self._hooks = HookSet(self)
+        self._hooks.add(callback, slow_threshold)
+
+    def remove_hook(self, callback: callable) -> None:
+        """
+        Unregister a callback, restoring the untimed methods once none remain
+        """
+        if self._hooks is None:
+            return
+        self._hooks.remove(callback)
+        if self._hooks.is_empty():
+            self._hooks = None
+
+    def _probe_length(self, key: str) -> int:
+        """
+        Return number of chain nodes a lookup of key walks
+        """
+        bucket = self._buckets[self._hash_function(key) % self._capacity]
+        if isinstance(bucket, SortedBucket):
+            return bucket.search_length(key)
+        length = 0
+        for node in bucket:
+            length += 1
+            if node.key == key:
+                break
+        return length
+
+    # ------------------------------------------------------------------ #
+
+    def _same_layout(self, other: "HashMap") -> bool:
+        """
+        Determine if a key lives in the same bucket index in both maps
+        """
+        return (self._capacity == other._capacity and
+                self._hash_function is other._hash_function)
+
+    def _other_bucket(self, other: "HashMap", index: int, key: str,
+                      same_layout: bool) -> LinkedList:
+        """
+        Return the bucket of other that would hold a key found at index
+        """
+        if same_layout:
+            return other._buckets._data[index]
+        return other._buckets._data[other._hash_function(key) % other._capacity]
+
+    def _reserve(self, size: int) -> None:
+        """
+        Resize once so that size entries fit without further resizes
+        """
+        if size > self._capacity:
+            self.resize_table(size)
+
+    def update(self, other: "HashMap") -> None:
+        """
+        Copies every key/value pair of other into the hash map,
+        replacing values of keys that already exist
+        """
+        if not self._same_layout(other):
+            self._reserve(self._size + other.get_size())
+            for i in range(other._capacity):
+                for node in other._buckets._data[i]:
+                    self.put(node.key, node.value)
+            return
+        # Walk matching buckets side by side, no key is rehashed
+        for i in range(self._capacity):
+            for node in other._buckets._data[i]:
+                # Re-read the bucket, an insert may have treeified it
+                match = self._buckets._data[i].contains(node.key)
+                if match:
+                    match.value = node.value
+                else:
+                    self._size += 1
+                    self._insert_into(self._buckets, i, node.key, node.value)
+        # Resize once after the merge rather than during it
+        if self.table_load() > 1.0:
+            self.resize_table(max(self._capacity * 2, self._size))
+
+    def union(self, other: "HashMap") -> "HashMap":
+        """
+        Returns new hash map with the pairs of both maps,
+        preferring values from other for shared keys
+        """
+        # Copy self bucket by bucket first, update() then presizes once
+        result = HashMap(self._capacity, self._hash_function)
+        result.update(self)
+        result.update(other)
+        return result
+
+    def _filter(self, other: "HashMap", keep_shared: bool) -> "HashMap":
+        """
+        Returns new hash map with the pairs whose key presence
+        in other matches keep_shared
+        """
+        result = HashMap(self._capacity, self._hash_function)
+        same_layout = self._same_layout(other)
+        # Result shares this map's layout, so pairs keep their bucket index
+        for i in range(self._capacity):
+            for node in self._buckets._data[i]:
+                bucket = self._other_bucket(other, i, node.key, same_layout)
+                if (bucket.contains(node.key) is not None) == keep_shared:
+                    result._size += 1
+                    result._insert_into(result._buckets, i, node.key, node.value)
+        return result
+
+    def intersection(self, other: "HashMap") -> "HashMap":
+        """
+        Returns new hash map with the pairs whose key is also in other
+        """
+        return self._filter(other, True)
+
+    def difference(self, other: "HashMap") -> "HashMap":
+        """
+        Returns new hash map with the pairs whose key is not in other
+        """
+        return self._filter(other, False)
+
+    def keys_equal(self, other: "HashMap") -> bool:
+        """
+        Determines if both hash maps contain exactly the same keys
+        """
+        if self._size != other.get_size():
+            return False
+        same_layout = self._same_layout(other)
+        for i in range(self._capacity):
+            for node in self._buckets._data[i]:
+                bucket = self._other_bucket(other, i, node.key, same_layout)
+                if bucket.contains(node.key) is None:
+                    return False
+        return True
+
+    def freeze(self) -> FrozenHashMap:
+        """
+        Returns read-only copy of the hash map backed by a minimal perfect hash
+        """
+        return FrozenHashMap(self.get_keys_and_values())
+
+    def share(self, name: str = None) -> SharedHashMap:
+        """
+        Returns read-only copy of the hash map published to shared memory,
+        which other processes can attach to by name
+        """
+        return SharedHashMap.publish(self.get_keys_and_values(), name)
+
+
+def _is_int64_array(da: DynamicArray) -> bool:
+    """
+    Determine if every element of the array is an int that fits in int64
+    """
+    for i in range(da.length()):
+        value = da[i]
+        # bool is excluded since str(True) differs from str(1)
+        if type(value) is not int or not -(1 << 63) <= value < (1 << 63):
+            return False
+    return True
+
+
 def find_mode(da: DynamicArray) -> tuple[DynamicArray, int]:
     """
-    Returns mode and frequency within an array
+    Returns mode and frequency within an array. Tied modes are listed in
+    no specified order, which differs between the NumPy, int and str paths
     """
+    # Sort ints, floats and short strs with NumPy when it is installed
+    result = find_mode_numpy(da)
+    if result is not None:
+        return result
+
+    # Count int64 values directly, without converting each one to str
+    if da.length() > 0 and _is_int64_array(da):
+        counts = IntHashMap(value_type='q')
+        for i in range(da.length()):
+            counts.increment(da[i])
+        mode_values, highest_frequency = _highest_frequency(counts.get_keys_and_values())
+        # Report modes as str, like the general path
+        for i in range(mode_values.length()):
+            mode_values[i] = str(mode_values[i])
+        return mode_values, highest_frequency
+
     frequency_map = HashMap()
     # Convert to str for key
     for i in range(da.length()):
@@ -204,10 +609,16 @@ def find_mode(da: DynamicArray) -> tuple[DynamicArray, int]:
             frequency_map.put(key, frequency_map.get(key) + 1)
         else:
             frequency_map.put(key, 1)
+    return _highest_frequency(frequency_map.get_keys_and_values())
+
+
+def _highest_frequency(keys_and_values: DynamicArray) -> tuple[DynamicArray, int]:
+    """
+    Returns keys sharing the highest count and that count
+    """
     # Create array with frequenecy and get pairs
     mode_values = DynamicArray()
     highest_frequency = 0
-    keys_and_values = frequency_map.get_keys_and_values()
     for i in range(keys_and_values.length()):
         key, value = keys_and_values[i]
         # If higher, update, reset, and add to mode
@@ -221,6 +632,92 @@ def find_mode(da: DynamicArray) -> tuple[DynamicArray, int]:
     return mode_values, highest_frequency
 
 
+def find_mode_stream(iterable, k: int, counters: int = None,
+                     sketch: CountMinSketch = None) -> tuple[DynamicArray, int]:
+    """
+    Returns up to k most frequent values of a stream as (value, low, high)
+    tuples, most frequent first, and the stream length n. Counts are kept
+    in a fixed-size HashMap of counters entries (Misra-Gries), so every
+    value seen more than n / (counters + 1) times is a candidate and its
+    true frequency lies in [low, high]. A CountMinSketch tightens high
+    """
+    if k < 1:
+        raise ValueError("k must be positive")
+    if counters is None:
+        counters = 10 * k
+    if counters < k:
+        raise ValueError("counters must be at least k")
+
+    # A prime capacity above counters keeps the load at most 1.0, so the map never resizes
+    counts = HashMap(counters + 1)
+    # Times every counter was decremented; bounds the undercount of any value
+    decrements = 0
+    n = 0
+    for value in iterable:
+        # Convert to str for key, like find_mode
+        key = str(value)
+        n += 1
+        if sketch is not None:
+            sketch.add(key)
+        count = counts.get(key)
+        if count is not None:
+            counts.put(key, count + 1)
+        elif counts.get_size() < counters:
+            counts.put(key, 1)
+        else:
+            # The new value and every counter each lose one occurrence
+            counts = _decrement_counters(counts)
+            decrements += 1
+
+    # Keep the k candidates with the highest lower bound, in descending order
+    top = DynamicArray()
+    keys_and_values = counts.get_keys_and_values()
+    for i in range(keys_and_values.length()):
+        key, low = keys_and_values[i]
+        high = low + decrements
+        if sketch is not None:
+            high = min(high, sketch.estimate(key))
+        if top.length() == k and low <= top[k - 1][1]:
+            continue
+        position = top.length()
+        while position > 0 and top[position - 1][1] < low:
+            position -= 1
+        top = _inserted(top, position, (key, low, high), k)
+    return top, n
+
+
+def _decrement_counters(counts: HashMap) -> HashMap:
+    """
+    Returns a map of the same capacity with every count one lower,
+    dropping the counts that reach zero
+    """
+    decremented = HashMap(counts.get_capacity(), counts._hash_function)
+    keys_and_values = counts.get_keys_and_values()
+    for i in range(keys_and_values.length()):
+        key, count = keys_and_values[i]
+        if count > 1:
+            decremented.put(key, count - 1)
+    return decremented
+
+
+def _inserted(da: DynamicArray, position: int, item: object, limit: int) -> DynamicArray:
+    """
+    Returns a copy of the array with item inserted at position,
+    truncated to at most limit elements
+    """
+    result = DynamicArray()
+    for i in range(da.length() + 1):
+        if result.length() == limit:
+            break
+        if i < position:
+            result.append(da[i])
+        elif i == position:
+            result.append(item)
+        else:
+            result.append(da[i - 1])
+    return result
+
+
 # ------------------- BASIC TESTING ---------------------------------------- #
 
 if __name__ == "__main__":
@@ -421,3 +918,9 @@ if __name__ == "__main__":
         da = DynamicArray(case)
         mode, frequency = find_mode(da)
         print(f"Input: {da}\nMode : {mode}, Frequency: {frequency}\n")
+
+    print("\nfind_mode_stream - heavy hitters")
+    print("--------------------------------")
+    stream = (str(i % 3) if i % 2 else 'rare' + str(i) for i in range(2000))
+    top, n = find_mode_stream(stream, 3, 8, CountMinSketch(256, 4))
+    print(top, n)
@@ -0,0 +1,91 @@
+from array import array
+
+from int_hash_map import mix64
+
+# Added to a key's hash once per row so each row spreads keys differently
+ROW_SALT = 0x9E3779B97F4A7C15
+
+
+class CountMinSketch:
+    """
+    Fixed-size frequency sketch of depth rows by width int64 counters.
+    estimate() never undercounts; it overcounts by more than
+    e / width * total with probability below e ** -depth
+    """
+
+    def __init__(self, width: int = 2048, depth: int = 4) -> None:
+        """
+        Initialize a sketch with every counter zero
+        """
+        if width < 1 or depth < 1:
+            raise ValueError("width and depth must be positive")
+        self._width = width
+        self._depth = depth
+        # Row r occupies counters[r * width:(r + 1) * width]
+        self._counters = array('q', [0]) * (width * depth)
+        self._total = 0
+
+    def __str__(self) -> str:
+        """
+        Override string method to provide more readable output
+        """
+        return f"CountMinSketch(width={self._width}, depth={self._depth}, total={self._total})"
+
+    def _slots(self, key: str):
+        """
+        Yield the counter position of key in each row
+        """
+        width = self._width
+        # str hashes are cached by Python, so only the mixing is per row
+        key_hash = hash(key)
+        for row in range(self._depth):
+            yield row * width + mix64(key_hash + row * ROW_SALT) % width
+
+    def add(self, key: str, count: int = 1) -> int:
+        """
+        Add count occurrences of key and return its new estimate
+        """
+        counters = self._counters
+        estimate = None
+        for slot in self._slots(key):
+            counters[slot] += count
+            if estimate is None or counters[slot] < estimate:
+                estimate = counters[slot]
+        self._total += count
+        return estimate
+
+    def estimate(self, key: str) -> int:
+        """
+        Return an upper bound on the number of occurrences of key
+        """
+        counters = self._counters
+        estimate = None
+        for slot in self._slots(key):
+            if estimate is None or counters[slot] < estimate:
+                estimate = counters[slot]
+        return estimate
+
+    def get_total(self) -> int:
+        """
+        Return number of occurrences added
+        """
+        return self._total
+
+    def nbytes(self) -> int:
+        """
+        Return bytes used by the counters
+        """
+        return self._counters.itemsize * len(self._counters)
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+
+    print("\nCountMinSketch - estimates")
+    print("--------------------------")
+    sketch = CountMinSketch(64, 4)
+    for i in range(1000):
+        sketch.add('key' + str(i % 7 if i % 2 else i))
+    print(sketch, sketch.nbytes())
+    print(sketch.estimate('key1'), sketch.estimate('key3'), sketch.estimate('key998'))
@@ -0,0 +1,241 @@
+from array import array
+
+from a6_include import DynamicArray
+
+MASK_64 = (1 << 64) - 1
+
+# Slot states
+EMPTY = 0
+FILLED = 1
+TOMBSTONE = 2
+
+# Filled plus tombstone slots allowed before the table is rebuilt
+MAX_LOAD = 0.7
+
+
+def mix64(key: int) -> int:
+    """
+    Scramble an int64 key into a well-spread 64-bit hash (splitmix64 finalizer)
+    """
+    key &= MASK_64
+    key = ((key ^ (key >> 30)) * 0xBF58476D1CE4E5B9) & MASK_64
+    key = ((key ^ (key >> 27)) * 0x94D049BB133111EB) & MASK_64
+    return key ^ (key >> 31)
+
+
+class IntHashMap:
+    def __init__(self, capacity: int = 16, value_type: str = None) -> None:
+        """
+        Initialize new HashMap for int64 keys that uses linear probing
+        over typed arrays. value_type 'q' or 'd' stores int64 or float
+        values unboxed; None stores arbitrary objects
+        """
+        if value_type not in (None, 'q', 'd'):
+            raise ValueError(f"unsupported value type: {value_type}")
+        self._value_type = value_type
+
+        # capacity must be a power of two
+        self._capacity = self._next_power_of_two(max(capacity, 8))
+        self._allocate(self._capacity)
+        self._size = 0
+
+    def __str__(self) -> str:
+        """
+        Override string method to provide more readable output
+        """
+        out = ''
+        for i in range(self._capacity):
+            if self._states[i] == FILLED:
+                out += str(i) + ': ' + str(self._keys[i]) + ': ' + str(self._values[i]) + '\n'
+        return out
+
+    @staticmethod
+    def _next_power_of_two(capacity: int) -> int:
+        """
+        Return the smallest power of two not less than the given number
+        """
+        power = 1
+        while power < capacity:
+            power *= 2
+        return power
+
+    def _allocate(self, capacity: int) -> None:
+        """
+        Create empty slot arrays for the given capacity
+        """
+        self._states = bytearray(capacity)
+        self._keys = array('q', [0]) * capacity
+        if self._value_type is None:
+            # Index DynamicArray's backing list directly on the hot path
+            self._values = DynamicArray([None] * capacity)._data
+        else:
+            self._values = array(self._value_type, [0]) * capacity
+        self._used = 0
+
+    def get_size(self) -> int:
+        """
+        Return size of map
+        """
+        return self._size
+
+    def get_capacity(self) -> int:
+        """
+        Return capacity of map
+        """
+        return self._capacity
+
+    # ------------------------------------------------------------------ #
+
+    def _locate(self, key: int) -> int:
+        """
+        Return the slot holding key, or -1 - slot where it would be inserted
+        """
+        states, keys = self._states, self._keys
+        mask = self._capacity - 1
+        slot = mix64(key) & mask
+        free = -1
+        # An empty slot always remains, so the probe always ends
+        while True:
+            state = states[slot]
+            if state == EMPTY:
+                return -1 - (slot if free < 0 else free)
+            if state == FILLED:
+                if keys[slot] == key:
+                    return slot
+            elif free < 0:
+                free = slot
+            slot = (slot + 1) & mask
+
+    def _insert(self, slot: int, key: int, value: object) -> None:
+        """
+        Store a new key/value pair in a free slot found by _locate
+        """
+        if self._states[slot] == EMPTY:
+            self._used += 1
+        self._states[slot] = FILLED
+        self._keys[slot] = key
+        self._values[slot] = value
+        self._size += 1
+        # Load factor verifier, tombstones count until the rebuild
+        if self._used >= self._capacity * MAX_LOAD:
+            self.resize_table(self._size * 2)
+
+    def put(self, key: int, value: object) -> None:
+        """
+        Update a key/value pair in the hash map
+        """
+        slot = self._locate(key)
+        if slot >= 0:
+            self._values[slot] = value
+        else:
+            self._insert(-1 - slot, key, value)
+
+    def increment(self, key: int, amount: object = 1) -> object:
+        """
+        Add amount to the value of key, starting from 0 if absent,
+        and return the new value
+        """
+        slot = self._locate(key)
+        if slot >= 0:
+            self._values[slot] += amount
+            return self._values[slot]
+        self._insert(-1 - slot, key, amount)
+        return amount
+
+    def get(self, key: int, default: object = None) -> object:
+        """
+        Returns value associated with a given key, or default if not found
+        """
+        slot = self._locate(key)
+        if slot < 0:
+            return default
+        return self._values[slot]
+
+    def contains_key(self, key: int) -> bool:
+        """
+        Returns whether a key is in the hash map
+        """
+        return self._locate(key) >= 0
+
+    def remove(self, key: int) -> None:
+        """
+        Remove the given key and its value from the hash map
+        """
+        slot = self._locate(key)
+        if slot < 0:
+            return
+        self._states[slot] = TOMBSTONE
+        if self._value_type is None:
+            self._values[slot] = None
+        self._size -= 1
+
+    def table_load(self) -> float:
+        """
+        Returns current load factor
+        """
+        return self._size / self._capacity
+
+    def empty_buckets(self) -> int:
+        """
+        Return number of empty slots
+        """
+        return self._capacity - self._states.count(FILLED)
+
+    def resize_table(self, new_capacity: int) -> None:
+        """
+        Change the capacity of the hash table, dropping tombstones
+        """
+        new_capacity = self._next_power_of_two(
+            max(new_capacity, int(self._size / MAX_LOAD) + 1, 8))
+        states, keys, values = self._states, self._keys, self._values
+        self._allocate(new_capacity)
+        self._capacity = new_capacity
+        mask = new_capacity - 1
+        for i in range(len(states)):
+            if states[i] == FILLED:
+                slot = mix64(keys[i]) & mask
+                while self._states[slot] != EMPTY:
+                    slot = (slot + 1) & mask
+                self._states[slot] = FILLED
+                self._keys[slot] = keys[i]
+                self._values[slot] = values[i]
+        self._used = self._size
+
+    def clear(self) -> None:
+        """
+        Clears the contents of the hash map
+        """
+        self._allocate(self._capacity)
+        self._size = 0
+
+    def get_keys_and_values(self) -> DynamicArray:
+        """
+        Returns array that contains each key/value pair in the hash map
+        """
+        result = DynamicArray()
+        for i in range(self._capacity):
+            if self._states[i] == FILLED:
+                result.append((self._keys[i], self._values[i]))
+        return result
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+
+    print("\nIntHashMap - put and remove")
+    print("---------------------------")
+    m = IntHashMap(8)
+    for i in range(150):
+        m.put(i * 7919, str(i))
+        if i % 25 == 24:
+            print(m.empty_buckets(), round(m.table_load(), 2), m.get_size(), m.get_capacity())
+    m.remove(0)
+    print(m.get(7919), m.get(0), m.contains_key(0), m.get_size())
+
+    print("\nIntHashMap - typed counters")
+    print("---------------------------")
+    m = IntHashMap(value_type='q')
+    for value in (2, 4, 2, 6, 8, 4, 1, 3, 4, 5, 7, 3, 3, 2, -(1 << 63)):
+        m.increment(value)
+    print(m.get_keys_and_values())
@@ -0,0 +1,158 @@
+from array import array
+from os.path import commonprefix
+
+# Every this many keys a front-coded arena stores a key in full
+RESTART_INTERVAL = 16
+
+# Longest key, in UTF-8 bytes, a front-coded arena can share a prefix with
+MAX_PREFIX = 0xFFFF
+
+
+class KeyArena:
+    """
+    str keys stored UTF-8 encoded back to back in one bytearray.
+    Key i occupies arena[offsets[i]:offsets[i + 1]], so a key costs its
+    encoded bytes plus one offset instead of a str object and a pointer.
+    Supported methods: append, matches, length and [] to decode a key
+    """
+
+    def __init__(self) -> None:
+        """
+        Initialize an empty arena
+        """
+        self._arena = bytearray()
+        # Offsets switch from 32 to 64 bits once the arena outgrows them
+        self._offsets = array('I', [0])
+
+    def __str__(self) -> str:
+        """
+        Override string method to provide more readable output
+        """
+        out = ''
+        for i in range(self.length()):
+            out += (', ' if out else '') + repr(self[i])
+        return 'ARENA [' + out + ']'
+
+    def _store(self, data: bytes) -> None:
+        """
+        Append encoded bytes and the offset that ends them
+        """
+        self._arena += data
+        if len(self._arena) > 0xFFFFFFFF and self._offsets.typecode == 'I':
+            self._offsets = array('q', self._offsets)
+        self._offsets.append(len(self._arena))
+
+    def append(self, key: str) -> None:
+        """
+        Add a key at the end of the arena
+        """
+        self._store(key.encode('utf-8', 'surrogatepass'))
+
+    def matches(self, index: int, key: bytes) -> bool:
+        """
+        Determine if the key at index equals an encoded key, without copying it
+        """
+        start = self._offsets[index]
+        return (self._offsets[index + 1] - start == len(key) and
+                self._arena.startswith(key, start))
+
+    def __getitem__(self, index: int) -> str:
+        """
+        Return the key at index
+        """
+        return self._arena[self._offsets[index]:self._offsets[index + 1]].decode(
+            'utf-8', 'surrogatepass')
+
+    def length(self) -> int:
+        """
+        Return number of keys in the arena, including removed ones
+        """
+        return len(self._offsets) - 1
+
+    def nbytes(self) -> int:
+        """
+        Return bytes used by the arena and its index arrays
+        """
+        return (len(self._arena) +
+                self._offsets.itemsize * len(self._offsets))
+
+
+class FrontCodedKeyArena(KeyArena):
+    """
+    KeyArena that stores each key as the length of the prefix it shares with
+    the key before it plus the remaining suffix. Every RESTART_INTERVAL keys
+    a key is stored in full, so decoding or comparing a key reads at most
+    one restart block. Keys inserted in order with shared prefixes,
+    such as 'key1', 'key2', ..., then cost a few bytes each
+    """
+
+    def __init__(self) -> None:
+        """
+        Initialize an empty front-coded arena
+        """
+        super().__init__()
+        self._prefixes = array('H')
+        self._last = b''
+
+    def append(self, key: str) -> None:
+        """
+        Add a key at the end of the arena
+        """
+        data = key.encode('utf-8', 'surrogatepass')
+        prefix = 0
+        if self.length() % RESTART_INTERVAL:
+            prefix = min(len(commonprefix((self._last, data))), MAX_PREFIX)
+        self._prefixes.append(prefix)
+        self._store(data[prefix:])
+        self._last = data
+
+    def matches(self, index: int, key: bytes) -> bool:
+        """
+        Determine if the key at index equals an encoded key, without decoding it
+        """
+        offsets, prefixes = self._offsets, self._prefixes
+        prefix = prefixes[index]
+        start = offsets[index]
+        if (prefix + offsets[index + 1] - start != len(key) or
+                not self._arena.startswith(key[prefix:], start)):
+            return False
+        # key[:prefix] must match the keys before this one, suffix by suffix,
+        # back to the restart key at the latest
+        needed = prefix
+        while needed:
+            index -= 1
+            shared = prefixes[index]
+            if needed > shared:
+                if not self._arena.startswith(key[shared:needed], offsets[index]):
+                    return False
+                needed = shared
+        return True
+
+    def __getitem__(self, index: int) -> str:
+        """
+        Return the key at index, decoded from its restart key forward
+        """
+        offsets, prefixes = self._offsets, self._prefixes
+        data = b''
+        for i in range(index - index % RESTART_INTERVAL, index + 1):
+            data = data[:prefixes[i]] + self._arena[offsets[i]:offsets[i + 1]]
+        return data.decode('utf-8', 'surrogatepass')
+
+    def nbytes(self) -> int:
+        """
+        Return bytes used by the arena and its index arrays
+        """
+        return super().nbytes() + self._prefixes.itemsize * len(self._prefixes)
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+
+    print("\nKeyArena - plain and front coded")
+    print("--------------------------------")
+    for arena in (KeyArena(), FrontCodedKeyArena()):
+        for i in range(100):
+            arena.append('str' + str(i))
+        print(arena.length(), arena.nbytes(), arena[0], arena[99],
+              arena.matches(37, b'str37'), arena.matches(37, b'str38'))
@@ -0,0 +1,104 @@
+from a6_include import DynamicArray
+
+# Shorter arrays are counted faster by a HashMap than converted to NumPy
+MIN_LENGTH = 1024
+
+# Longest str, in characters, counted as a fixed-width NumPy string
+MAX_STR_WIDTH = 32
+
+
+def _kind(data: list) -> str:
+    """
+    Return 'int', 'float' or 'str' if every element has that exact type,
+    else None. bool and str subclasses are excluded, since their str()
+    may differ from the value NumPy would count
+    """
+    first = type(data[0])
+    if first not in (int, float, str):
+        return None
+    for value in data:
+        if type(value) is not first:
+            return None
+    if first is str:
+        for value in data:
+            # NumPy drops trailing NULs from fixed-width strings
+            if len(value) > MAX_STR_WIDTH or value.endswith('\x00'):
+                return None
+    return first.__name__
+
+
+def _numpy():
+    """
+    Return the numpy module, or None if it is not installed. Imported on
+    first use, so importing a map module does not pay for NumPy
+    """
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+def find_mode_numpy(da: DynamicArray) -> tuple[DynamicArray, int]:
+    """
+    Returns mode and frequency within an array of ints, floats or short
+    strs by sorting a NumPy copy once. Tied modes come out in sorted value
+    order, not the bucket order of the HashMap path. Returns None if NumPy
+    is missing or the array does not qualify, so the caller can count
+    with a HashMap
+    """
+    data = da._data
+    if len(data) < MIN_LENGTH:
+        return None
+    kind = _kind(data)
+    if kind is None:
+        return None
+    numpy = _numpy()
+    if numpy is None:
+        return None
+
+    if kind == 'int':
+        try:
+            values = numpy.array(data, dtype=numpy.int64)
+        except OverflowError:
+            return None
+    elif kind == 'float':
+        # Count bit patterns, so 0.0 and -0.0 stay apart as their strs do,
+        # after making every NaN the same pattern, as every NaN's str is 'nan'
+        values = numpy.array(data, dtype=numpy.float64)
+        values[numpy.isnan(values)] = numpy.nan
+        values = values.view(numpy.int64)
+    else:
+        values = numpy.array(data, dtype=numpy.str_)
+
+    unique, counts = numpy.unique(values, return_counts=True)
+    highest_frequency = int(counts.max())
+    modes = unique[counts == highest_frequency]
+    if kind == 'float':
+        modes = modes.view(numpy.float64)
+
+    # Report modes as str, like the HashMap path
+    mode_values = DynamicArray()
+    for value in modes.tolist():
+        mode_values.append(str(value))
+    return mode_values, highest_frequency
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+
+    print("\nfind_mode_numpy - ints, floats and strs")
+    print("---------------------------------------")
+    cases = (
+        [i % 7 for i in range(5000)],
+        [0.0, -0.0, float('nan'), 1.5] * 300 + [-0.0],
+        ['Mint', 'Arch', 'Ubuntu', 'Mint'] * 400,
+        [True, 1] * 1000,
+    )
+    for case in cases:
+        result = find_mode_numpy(DynamicArray(case))
+        if result is None:
+            print('HashMap path')
+        else:
+            print(result[0], result[1])
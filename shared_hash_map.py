@@ -0,0 +1,307 @@
+import pickle
+import struct
+import threading
+import zlib
+from multiprocessing import resource_tracker, shared_memory
+
+from a6_include import DynamicArray
+
+# Block header: magic, capacity, size
+HEADER = struct.Struct('<8sQQ')
+MAGIC = b'SHMAP001'
+
+# Arena entry header: key length, value length; key and value bytes follow
+ENTRY = struct.Struct('<II')
+
+# Filled slots allowed per slot of the table
+MAX_LOAD = 2 / 3
+
+# Serializes attaches that swap out resource_tracker.register
+_ATTACH_LOCK = threading.Lock()
+
+
+def _attach_untracked(name: str) -> shared_memory.SharedMemory:
+    """
+    Open an existing block without registering it with the resource tracker.
+    Before Python 3.13 attaching always registers, and the tracker would then
+    unlink the block when the attaching process exits. Unregistering afterwards
+    is not enough, since multiprocessing children share their parent's tracker
+    and would drop the publisher's own registration.
+    Only this thread's registration of this block is skipped while the
+    tracker is patched; other threads creating blocks are still registered
+    """
+    thread = threading.get_ident()
+
+    def register_others(resource: str, rtype: str) -> None:
+        if threading.get_ident() == thread and resource.lstrip('/') == name.lstrip('/'):
+            return
+        register(resource, rtype)
+
+    with _ATTACH_LOCK:
+        register = resource_tracker.register
+        resource_tracker.register = register_others
+        try:
+            return shared_memory.SharedMemory(name)
+        finally:
+            resource_tracker.register = register
+
+
+class SharedHashMap:
+    """
+    Read-only map laid out flat in a multiprocessing.shared_memory block,
+    so every attached process reads the same physical pages:
+
+        header | crc32 hash per slot | arena offset per slot (0 = empty) | arena
+
+    Slots are probed linearly. Keys are stored UTF-8 encoded and compared as
+    bytes; only the value of a found key is unpickled. crc32 is used rather
+    than the map's hash function because the layout must hash identically
+    in every process (hash() of str is salted per process)
+    """
+
+    def __init__(self, shm: shared_memory.SharedMemory, owner: bool) -> None:
+        """
+        Wrap a block created by publish() or opened by attach()
+        """
+        self._buf = None
+        magic, capacity, size = HEADER.unpack_from(shm.buf, 0)
+        if magic != MAGIC:
+            raise ValueError(f"shared memory block {shm.name} is not a SharedHashMap")
+        self._shm = shm
+        self._owner = owner
+        self._capacity = capacity
+        self._size = size
+        self._buf = shm.buf
+        hashes_end = HEADER.size + 4 * capacity
+        self._hashes = shm.buf[HEADER.size:hashes_end].cast('I')
+        self._offsets = shm.buf[hashes_end:hashes_end + 8 * capacity].cast('Q')
+
+    def __str__(self) -> str:
+        """
+        Override string method to provide more readable output
+        """
+        out = ''
+        pairs = self.get_keys_and_values()
+        for i in range(pairs.length()):
+            out += str(pairs[i][0]) + ': ' + str(pairs[i][1]) + '\n'
+        return out
+
+    def __reduce__(self):
+        """
+        Pickle by name, so workers receiving the map attach to the block
+        """
+        return SharedHashMap.attach, (self.name,)
+
+    def __del__(self) -> None:
+        """
+        Release the views into the block before the block itself is collected
+        """
+        self.close()
+
+    def __enter__(self) -> "SharedHashMap":
+        """
+        Use the map as a context manager
+        """
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        """
+        Detach when leaving the context; the publisher also unlinks the block
+        """
+        self.close()
+        if self._owner:
+            self.unlink()
+
+    @staticmethod
+    def _next_power_of_two(capacity: int) -> int:
+        """
+        Return the smallest power of two not less than the given number
+        """
+        power = 1
+        while power < capacity:
+            power *= 2
+        return power
+
+    @classmethod
+    def publish(cls, keys_and_values: DynamicArray, name: str = None) -> "SharedHashMap":
+        """
+        Create a shared memory block holding the given unique (key, value)
+        pairs, such as the result of HashMap.get_keys_and_values().
+        The caller owns the block and must unlink() it when done
+        """
+        size = keys_and_values.length()
+        capacity = cls._next_power_of_two(max(int(size / MAX_LOAD) + 1, 8))
+        tables_end = HEADER.size + 12 * capacity
+
+        # Encode everything first to size the block
+        entries = DynamicArray()
+        arena_size = 0
+        for i in range(size):
+            key, value = keys_and_values[i]
+            if type(key) is not str:
+                raise ValueError(f"SharedHashMap keys must be str, got {type(key).__name__}")
+            key_bytes = key.encode('utf-8', 'surrogatepass')
+            value_bytes = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+            entries.append((key_bytes, value_bytes))
+            arena_size += ENTRY.size + len(key_bytes) + len(value_bytes)
+
+        shm = shared_memory.SharedMemory(name, create=True,
+                                         size=tables_end + max(arena_size, 1))
+        buf = shm.buf
+        HEADER.pack_into(buf, 0, MAGIC, capacity, size)
+        hashes_end = HEADER.size + 4 * capacity
+        hashes = buf[HEADER.size:hashes_end].cast('I')
+        offsets = buf[hashes_end:tables_end].cast('Q')
+        mask = capacity - 1
+        # Empty slots already read as offset 0, so only filled slots are written
+        offset = tables_end
+        for i in range(size):
+            key_bytes, value_bytes = entries[i]
+            hash_value = zlib.crc32(key_bytes)
+            slot = hash_value & mask
+            while offsets[slot]:
+                slot = (slot + 1) & mask
+            hashes[slot] = hash_value
+            offsets[slot] = offset
+            ENTRY.pack_into(buf, offset, len(key_bytes), len(value_bytes))
+            offset += ENTRY.size
+            buf[offset:offset + len(key_bytes)] = key_bytes
+            offset += len(key_bytes)
+            buf[offset:offset + len(value_bytes)] = value_bytes
+            offset += len(value_bytes)
+        hashes.release()
+        offsets.release()
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name: str) -> "SharedHashMap":
+        """
+        Open a block published by another process, without copying it
+        """
+        try:
+            shm = shared_memory.SharedMemory(name, track=False)
+        except TypeError:
+            shm = _attach_untracked(name)
+        return cls(shm, owner=False)
+
+    @property
+    def name(self) -> str:
+        """
+        Name other processes attach with
+        """
+        return self._shm.name
+
+    def get_size(self) -> int:
+        """
+        Return size of map
+        """
+        return self._size
+
+    def get_capacity(self) -> int:
+        """
+        Return capacity of map
+        """
+        return self._capacity
+
+    # ------------------------------------------------------------------ #
+
+    def _find(self, key: str) -> int:
+        """
+        Return arena offset of the entry holding key, or 0 if not found
+        """
+        if type(key) is not str:
+            return 0
+        key_bytes = key.encode('utf-8', 'surrogatepass')
+        hash_value = zlib.crc32(key_bytes)
+        hashes, offsets, buf = self._hashes, self._offsets, self._buf
+        mask = self._capacity - 1
+        slot = hash_value & mask
+        # The table is never full, so an empty slot always ends the probe
+        while True:
+            offset = offsets[slot]
+            if offset == 0:
+                return 0
+            if hashes[slot] == hash_value:
+                key_length = ENTRY.unpack_from(buf, offset)[0]
+                start = offset + ENTRY.size
+                if buf[start:start + key_length] == key_bytes:
+                    return offset
+            slot = (slot + 1) & mask
+
+    def _value_at(self, offset: int) -> object:
+        """
+        Return the unpickled value of the entry at an arena offset
+        """
+        key_length, value_length = ENTRY.unpack_from(self._buf, offset)
+        start = offset + ENTRY.size + key_length
+        return pickle.loads(self._buf[start:start + value_length])
+
+    def get(self, key: str, default: object = None) -> object:
+        """
+        Returns value associated with a given key, or default if not found
+        """
+        offset = self._find(key)
+        if offset == 0:
+            return default
+        return self._value_at(offset)
+
+    def contains_key(self, key: str) -> bool:
+        """
+        Returns whether a key is in the map
+        """
+        return self._find(key) != 0
+
+    def get_keys_and_values(self) -> DynamicArray:
+        """
+        Returns array that contains each key/value pair in the map
+        """
+        result = DynamicArray()
+        for slot in range(self._capacity):
+            offset = self._offsets[slot]
+            if offset:
+                key_length = ENTRY.unpack_from(self._buf, offset)[0]
+                start = offset + ENTRY.size
+                key = str(self._buf[start:start + key_length], 'utf-8', 'surrogatepass')
+                result.append((key, self._value_at(offset)))
+        return result
+
+    def close(self) -> None:
+        """
+        Detach this process from the block
+        """
+        if self._buf is None:
+            return
+        # Views into the block must be released before it can be closed
+        self._hashes.release()
+        self._offsets.release()
+        self._hashes = self._offsets = self._buf = None
+        self._shm.close()
+
+    def unlink(self) -> None:
+        """
+        Destroy the block once every process has closed it; publisher only
+        """
+        if not self._owner:
+            raise ValueError("only the publishing process can unlink a SharedHashMap")
+        self._shm.unlink()
+        self._owner = False
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+    from a6_include import hash_function_1
+    from hash_map_sc import HashMap
+
+    print("\nSharedHashMap - publish and attach")
+    print("----------------------------------")
+    m = HashMap(53, hash_function_1)
+    for i in range(150):
+        m.put('str' + str(i), i * 100)
+    m.put('tsr1', ['anagram'])
+    with m.share() as shared:
+        attached = pickle.loads(pickle.dumps(shared))
+        print(attached.get_size(), attached.get_capacity(), attached.get('str7'), attached.get('tsr1'))
+        print(attached.contains_key('str149'), attached.contains_key('str150'),
+              attached.get('missing', 'default'))
+        attached.close()